@@ -5,11 +5,34 @@ Convert Markdown documents to professional PDFs with automatic
 Mermaid diagram rendering and configurable emoji support.
 """
 
-from .converter import convert_markdown_to_pdf, parse_markdown
-from .html_renderer import convert_markdown_to_pdf_html
-from .mermaid import render_mermaid_to_png
-from .emoji_handler import EmojiHandler
-
 __version__ = "1.4.0"
 __author__ = "Roberto Butinar"
-__all__ = ["convert_markdown_to_pdf", "convert_markdown_to_pdf_html", "parse_markdown", "render_mermaid_to_png", "EmojiHandler"]
+__all__ = ["convert_markdown_to_pdf", "convert_markdown_to_pdf_html", "PdfRenderer", "parse_markdown", "parse_markdown_with_stats", "render_mermaid_to_png", "EmojiHandler"]
+
+
+# Public names and the submodule defining each. They are imported on first
+# use: the ReportLab engine is not needed at all with the default HTML
+# engine, and `md2pdf --help` should not pay for Markdown or Playwright
+_LAZY_EXPORTS = {
+    "convert_markdown_to_pdf": ".converter",
+    "convert_markdown_to_pdf_html": ".html_renderer",
+    "PdfRenderer": ".html_renderer",
+    "parse_markdown": "._parse",
+    "parse_markdown_with_stats": "._parse",
+    "render_mermaid_to_png": ".mermaid",
+    "EmojiHandler": ".emoji_handler",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -0,0 +1,14 @@
+# Cython declarations augmenting _parse.py
+# Only used when the package is built with Cython; the .py source stays the
+# reference implementation and runs unchanged without a C toolchain.
+
+import cython
+
+
+cpdef list parse_markdown(str md_text)
+
+
+@cython.locals(in_code_block=cython.bint, in_table=cython.bint,
+               elements=list, stats=dict, code_block_lines=list, table_lines=list,
+               kind=str, lang=str, code_block_lang=str, block_type=str)
+cpdef tuple parse_markdown_with_stats(str md_text)
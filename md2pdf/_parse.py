@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Markdown block parser
+Splits Markdown text into (type, content) elements for the PDF converter
+
+This module is plain Python, but it is compiled with Cython when the package
+is built with Cython available (see _parse.pxd for the type declarations).
+"""
+
+import re
+
+
+# Block-level line scanner used by parse_markdown.
+# Every line of the document yields exactly one match; the name of the group
+# that matched (m.lastgroup) is the element type and its value the content
+# (headers use 'header', with the level given by the length of 'level').
+# Alternatives are ordered by precedence: fences, then tables, headers,
+# lists, horizontal rules and finally plain paragraphs / empty lines.
+_BLOCK_RE = re.compile(
+    r'^(?:'
+    r'[^\S\n]*```(?P<fence>.*)'                                           # code fence (opening/closing)
+    r'|(?P<table>[^|\n]*\|.*)'                                            # table row
+    r'|(?P<level>#{1,4})[ ][^\S\n]*(?P<header>(?:\S(?:.*\S)?)?)[^\S\n]*'  # # Header ... #### Header
+    r'|[^\S\n]*[-*][ ](?P<list>.*\S)[^\S\n]*'                             # - item / * item
+    r'|[^\S\n]*\d+\.[^\S\n](?P<numlist>.*\S)[^\S\n]*'                     # 1. item
+    r'|[^\S\n]*(?P<hr>---|\*\*\*|___)[^\S\n]*'                            # horizontal rule
+    r'|[^\S\n]*(?P<p>\S(?:.*\S)?)[^\S\n]*'                                # paragraph
+    r'|(?P<space>[^\S\n]*)'                                               # empty line
+    r')$',
+    re.MULTILINE
+)
+
+
+def parse_markdown(md_text):
+    """
+    Parse Markdown text into structured elements
+
+    Args:
+        md_text: Markdown content as string
+
+    Returns:
+        List of (type, content) tuples
+    """
+    return parse_markdown_with_stats(md_text)[0]
+
+
+def parse_markdown_with_stats(md_text):
+    """
+    Parse Markdown text into structured elements, counting block types on the way
+
+    Args:
+        md_text: Markdown content as string
+
+    Returns:
+        Tuple of (elements, stats) where elements is the list of (type, content)
+        tuples returned by parse_markdown and stats is a dict with the number
+        of 'mermaid', 'code' and 'table' elements
+    """
+    elements = []
+    stats = {'mermaid': 0, 'code': 0, 'table': 0}
+
+    in_code_block = False
+    code_block_lines = []
+    code_block_lang = None
+    in_table = False
+    table_lines = []
+
+    for m in _BLOCK_RE.finditer(md_text):
+        kind = m.lastgroup
+
+        # Code blocks
+        if kind == 'fence':
+            if in_code_block:
+                # Closing code block
+                block_type = 'mermaid' if code_block_lang == 'mermaid' else 'code'
+                elements.append((block_type, '\n'.join(code_block_lines)))
+                stats[block_type] += 1
+                code_block_lines = []
+                code_block_lang = None
+                in_code_block = False
+            else:
+                # Opening code block - detect language
+                in_code_block = True
+                lang = m.group('fence').strip()
+                code_block_lang = lang if lang else None
+            continue
+
+        if in_code_block:
+            # Drop the '\r' of Windows line endings (other blocks strip it already)
+            code_block_lines.append(m.group().rstrip('\r'))
+            continue
+
+        # Tables
+        if kind == 'table':
+            if not in_table:
+                in_table = True
+                table_lines = []
+            table_lines.append(m.group())
+            continue
+        elif in_table:
+            elements.append(('table', table_lines))
+            stats['table'] += 1
+            table_lines = []
+            in_table = False
+
+        if kind == 'header':
+            elements.append((f"h{len(m.group('level'))}", m.group('header')))
+        elif kind == 'hr' or kind == 'space':
+            elements.append((kind, None))
+        else:
+            # Headers, lists and paragraphs carry their (stripped) text
+            elements.append((kind, m.group(kind)))
+
+    # Close any open table
+    if in_table:
+        elements.append(('table', table_lines))
+        stats['table'] += 1
+
+    return elements, stats
@@ -4,12 +4,16 @@ Command-line interface for md2pdf
 """
 
 import argparse
+import os
 import sys
+from itertools import repeat
 from pathlib import Path
-from .converter import convert_markdown_to_pdf
-from .html_renderer import convert_markdown_to_pdf_html
 from . import __version__
 
+# Every conversion runs its own Chromium (diagram workers are never nested
+# inside it, see md2pdf.mermaid), so by default at most this many run at once
+MAX_DEFAULT_JOBS = 4
+
 
 def main():
     """Main CLI entry point"""
@@ -20,7 +24,11 @@ def main():
 Examples:
   md2pdf document.md                           # Convert to document.pdf
   md2pdf doc.md -o report.pdf                 # Custom output name
+  md2pdf docs/*.md                            # Convert several files in parallel
+  md2pdf docs/*.md -j 2                       # Limit to 2 parallel conversions
   md2pdf doc.md --no-mermaid                  # Disable Mermaid rendering
+  md2pdf doc.md --no-mermaid-cache            # Re-render all Mermaid diagrams
+  md2pdf doc.md --pdf-cache                   # Reuse the PDF of an unchanged document
   md2pdf doc.md --title "My Report"          # Custom title
   md2pdf doc.md --page-size letter           # Use Letter size
   md2pdf doc.md --orientation landscape      # Landscape orientation
@@ -36,11 +44,18 @@ For more information: https://github.com/rbutinar/md2pdf-mermaid
 
     parser.add_argument(
         "input",
-        help="Input Markdown file"
+        nargs="+",
+        help="Input Markdown file(s)"
     )
     parser.add_argument(
         "-o", "--output",
-        help="Output PDF file (default: same name as input with .pdf extension)"
+        help="Output PDF file (default: same name as input with .pdf extension; single input only)"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        help=f"Number of files to convert in parallel when several inputs are given "
+             f"(default: CPU count, at most {MAX_DEFAULT_JOBS})"
     )
     parser.add_argument(
         "--no-mermaid",
@@ -85,6 +100,17 @@ For more information: https://github.com/rbutinar/md2pdf-mermaid
         default="default",
         help="Mermaid diagram color theme (default, neutral, dark, forest, base). Default: default"
     )
+    parser.add_argument(
+        "--no-mermaid-cache",
+        action="store_true",
+        help="Always re-render Mermaid diagrams instead of reusing cached images"
+    )
+    parser.add_argument(
+        "--pdf-cache",
+        action="store_true",
+        help="Reuse the PDF of an unchanged document instead of printing it again with Chromium "
+             "(html engine; changes to linked local images/CSS are not detected)"
+    )
     parser.add_argument(
         "--emoji-strategy",
         choices=["auto", "pilmoji", "remove", "keep"],
@@ -105,8 +131,34 @@ For more information: https://github.com/rbutinar/md2pdf-mermaid
 
     args = parser.parse_args()
 
+    if args.output and len(args.input) > 1:
+        parser.error("-o/--output can only be used with a single input file")
+
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("-j/--jobs must be at least 1")
+
+    if len(args.input) == 1:
+        return _convert_one(args.input[0], args)
+
+    # Conversions are independent (one output file each): run them in parallel
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    jobs = args.jobs or min(os.cpu_count() or 1, MAX_DEFAULT_JOBS)
+    try:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(args.input))) as executor:
+            results = list(executor.map(_convert_one, args.input, repeat(args)))
+    except BrokenProcessPool as e:
+        print(f"Error: A conversion process died unexpectedly ({e}); "
+              f"try fewer parallel conversions with -j", file=sys.stderr)
+        return 1
+    return max(results)
+
+
+def _convert_one(input_file, args):
+    """Convert a single Markdown file using the parsed CLI options"""
     # Validate input file
-    input_path = Path(args.input)
+    input_path = Path(input_file)
     if not input_path.exists():
         print(f"Error: File not found: {input_path}", file=sys.stderr)
         return 1
@@ -125,6 +177,8 @@ For more information: https://github.com/rbutinar/md2pdf-mermaid
         # Convert to PDF
         print(f"Converting {input_path} to PDF...")
         if args.engine == 'html':
+            from .html_renderer import convert_markdown_to_pdf_html
+
             print("  (Using HTML/Chromium engine - full emoji support)")
             if args.no_mermaid:
                 print("  (Mermaid rendering disabled)")
@@ -134,9 +188,14 @@ For more information: https://github.com/rbutinar/md2pdf-mermaid
                 title=title,
                 page_size=args.page_size,
                 orientation=args.orientation,
-                enable_mermaid=not args.no_mermaid
+                enable_mermaid=not args.no_mermaid,
+                mermaid_cache=not args.no_mermaid_cache,
+                pdf_cache=args.pdf_cache
             )
         else:
+            # Imported here: reportlab is only needed by this engine
+            from .converter import convert_markdown_to_pdf
+
             if args.no_mermaid:
                 print("  (Mermaid rendering disabled)")
 
@@ -151,7 +210,8 @@ For more information: https://github.com/rbutinar/md2pdf-mermaid
                 font_name=args.font if args.font and args.font.lower() != 'auto' else None,
                 mermaid_scale=args.mermaid_scale,
                 mermaid_theme=args.mermaid_theme,
-                emoji_strategy=args.emoji_strategy
+                emoji_strategy=args.emoji_strategy,
+                mermaid_cache=not args.no_mermaid_cache
             )
 
         # Success
@@ -4,9 +4,11 @@ Markdown to PDF Converter
 Professional PDF generation from Markdown with Mermaid diagram support
 """
 
+import io
 import os
 import re
-import tempfile
+import functools
+from itertools import islice
 from reportlab.lib.pagesizes import A4, A3, LETTER, landscape, portrait
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
@@ -15,12 +17,16 @@ from reportlab.platypus import (
     Preformatted, Image, PageBreak, Flowable, KeepTogether
 )
 from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
 from reportlab.lib.enums import TA_LEFT, TA_CENTER
 from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfbase.pdfmetrics import registerFontFamily
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
+
+from ._parse import parse_markdown, parse_markdown_with_stats
 
 try:
-    from .mermaid import render_mermaid_to_png, is_playwright_available
+    from .mermaid import render_mermaid_to_bytes_batch, render_mermaid_cached_batch, is_playwright_available
     MERMAID_AVAILABLE = True
 except ImportError:
     MERMAID_AVAILABLE = False
@@ -34,6 +40,43 @@ except ImportError:
     EMOJI_HANDLER_AVAILABLE = False
 
 
+# Inline formatting (compiled once, applied to every paragraph/list item/table cell)
+_BOLD_RE = re.compile(r'\*\*(.+?)\*\*')
+_INLINE_CODE_RE = re.compile(r'`(.+?)`')
+_XML_ESCAPE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+# Hyperlink forms stripped by remove_hyperlinks()
+_INLINE_LINK_RE = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+_REFERENCE_LINK_RE = re.compile(r'\[([^\]]+)\]\[[^\]]+\]')
+_LINK_DEFINITION_RE = re.compile(r'^\[([^\]]+)\]:\s*.*$', re.MULTILINE)
+
+# Characters of a table header separator row (|---|:---:|), besides whitespace
+_TABLE_SEPARATOR_CHARS = '|:-='
+
+# Text elements rendered as a single Normal paragraph, with their line prefix
+_TEXT_PREFIXES = {'p': '', 'list': '&#8226; ', 'numlist': '  '}
+
+# Headings that are kept on the same page as a directly following diagram
+_GROUPABLE_HEADINGS = frozenset(('h2', 'h3', 'h4'))
+
+# Page layout and vertical spacing, in points (cm converted once at import)
+PAGE_MARGIN = 2 * cm
+PAGE_NUMBER_Y = 1.5 * cm
+BLANK_LINE_SPACE = 0.2 * cm
+HR_SPACE = 0.3 * cm
+CODE_CHUNK_SPACE = 0.1 * cm
+DIAGRAM_SPACE_BEFORE = 0.3 * cm
+DIAGRAM_SPACE_AFTER = 0.5 * cm
+DIAGRAM_MIN_HEIGHT = 8 * cm  # Minimum height for readable diagrams
+
+
+# Emoji removed by remove_emoji() (simplified heuristic): misc symbols and
+# pictographs, emoticons, transport and map symbols (0x1F300-0x1F9FF),
+# misc symbols and dingbats (0x2600-0x27BF), miscellaneous technical
+# (clocks, etc., 0x2300-0x23FF) and variation selectors (0xFE00-0xFE0F)
+_EMOJI_RE = re.compile('[\U0001F300-\U0001F9FF\u2600-\u27BF\u2300-\u23FF\uFE00-\uFE0F]')
+
+
 def remove_emoji(text):
     """
     Remove emoji characters from text for PDF compatibility.
@@ -53,27 +96,7 @@ def remove_emoji(text):
     if not text:
         return text
 
-    result = []
-    for char in text:
-        codepoint = ord(char)
-
-        # Check if character is an emoji (simplified heuristic)
-        # Emoji are typically in ranges: 0x1F300-0x1F9FF, 0x2600-0x26FF, 0x2700-0x27BF
-        # Also skip variation selectors (0xFE00-0xFE0F)
-        is_emoji = (
-            (codepoint >= 0x1F300 and codepoint <= 0x1F9FF) or  # Misc symbols and pictographs
-            (codepoint >= 0x2600 and codepoint <= 0x26FF) or    # Misc symbols
-            (codepoint >= 0x2700 and codepoint <= 0x27BF) or    # Dingbats
-            (codepoint >= 0x1F600 and codepoint <= 0x1F64F) or  # Emoticons
-            (codepoint >= 0x1F680 and codepoint <= 0x1F6FF) or  # Transport and map symbols
-            (codepoint >= 0x2300 and codepoint <= 0x23FF) or    # Miscellaneous Technical (clocks, etc.)
-            (codepoint >= 0xFE00 and codepoint <= 0xFE0F)       # Variation selectors
-        )
-
-        if not is_emoji:
-            result.append(char)
-
-    return ''.join(result)
+    return _EMOJI_RE.sub('', text)
 
 
 def process_emoji(text, emoji_handler=None):
@@ -112,22 +135,76 @@ def remove_hyperlinks(text):
     Returns:
         Text with hyperlinks removed, keeping only the displayed text
     """
-    if not text:
+    # Every link form starts with '[': most text needs no regex pass at all
+    if not text or '[' not in text:
         return text
 
     # Remove inline links [text](url)
-    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
+    text = _INLINE_LINK_RE.sub(_link_text, text)
 
     # Remove reference-style links [text][ref]
-    text = re.sub(r'\[([^\]]+)\]\[[^\]]+\]', r'\1', text)
+    text = _REFERENCE_LINK_RE.sub(_link_text, text)
 
     # Remove standalone reference links [text] that might be references
     # but only if they're followed by a colon (link definitions)
-    text = re.sub(r'^\[([^\]]+)\]:\s*.*$', '', text, flags=re.MULTILINE)
+    if ']:' in text:
+        text = _LINK_DEFINITION_RE.sub('', text)
 
     return text
 
 
+# Replacement callables for the inline regexes: plain string concatenation is
+# several times cheaper than expanding a r'\1' template for every match
+def _link_text(match):
+    return match[1]
+
+
+def _bold_markup(match):
+    return '<b>' + match[1] + '</b>'
+
+
+def _inline_code_markup(match):
+    return '<font face="courier" color="#666666">' + match[1] + '</font>'
+
+
+def _format_inline(text):
+    """
+    Escape XML special characters and apply inline markdown (**bold**, `code`)
+
+    Args:
+        text: Plain text of a paragraph, list item or table cell
+
+    Returns:
+        ReportLab Paragraph markup
+    """
+    text = text.translate(_XML_ESCAPE_TABLE)
+    # Most text (and nearly all table cells) has no markup: skip the regexes
+    if '**' in text:
+        text = _BOLD_RE.sub(_bold_markup, text)
+    if '`' in text:
+        text = _INLINE_CODE_RE.sub(_inline_code_markup, text)
+    return text
+
+
+# PNG signature followed by the IHDR chunk, which starts with width and height
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_PNG_HEADER_SIZE = 24
+
+
+def _png_size(header):
+    """
+    Read the pixel size of a PNG image from its first bytes
+
+    Args:
+        header: Start of the image data (at least 24 bytes)
+
+    Returns:
+        Tuple of (width, height), or None if the data is not a PNG image
+    """
+    if len(header) < _PNG_HEADER_SIZE or not header.startswith(_PNG_SIGNATURE) \
+            or header[12:16] != b'IHDR':
+        return None
+    return int.from_bytes(header[16:20], 'big'), int.from_bytes(header[20:24], 'big')
 
 
 class HighQualityImage(Flowable):
@@ -135,12 +212,24 @@ class HighQualityImage(Flowable):
 
     def __init__(self, img_path):
         Flowable.__init__(self)
+        # img_path may also be the PNG data itself (bytes) for in-memory images
+        if isinstance(img_path, bytes):
+            size = _png_size(img_path)
+            img_path = ImageReader(io.BytesIO(img_path))
+        else:
+            with open(img_path, 'rb') as img_file:
+                size = _png_size(img_file.read(_PNG_HEADER_SIZE))
         self.img_path = img_path
 
-        # Open image to get dimensions
-        from PIL import Image as PILImage
-        pil_img = PILImage.open(img_path)
-        self.img_width_px, self.img_height_px = pil_img.size
+        # Get dimensions from the PNG header, decoding the image only for other formats
+        if size:
+            self.img_width_px, self.img_height_px = size
+        elif isinstance(img_path, ImageReader):
+            self.img_width_px, self.img_height_px = img_path.getSize()
+        else:
+            from PIL import Image as PILImage
+            with PILImage.open(img_path) as pil_img:
+                self.img_width_px, self.img_height_px = pil_img.size
         self.aspect_ratio = self.img_height_px / self.img_width_px
 
         # Disable auto-rotation - let diagrams display in their natural orientation
@@ -158,12 +247,9 @@ class HighQualityImage(Flowable):
 
         # Minimum height threshold: if available space is too small, request page break
         # This prevents diagrams from being squeezed into tiny remaining space at page bottom
-        MIN_HEIGHT_CM = 8  # Minimum 8cm height for readable diagrams
-        MIN_HEIGHT_PT = MIN_HEIGHT_CM * cm
-
         # If available height is too small, signal that we need more space
         # This will cause ReportLab to move the diagram to next page
-        if availHeight < MIN_HEIGHT_PT:
+        if availHeight < DIAGRAM_MIN_HEIGHT:
             # Return very large dimensions to trigger page break
             return availWidth * 2, availHeight * 2
 
@@ -213,93 +299,38 @@ class HighQualityImage(Flowable):
             self.canv.restoreState()
 
 
-def parse_markdown(md_text):
-    """
-    Parse Markdown text into structured elements
+# Code block layout: max characters per line, max lines per Preformatted chunk
+CODE_LINE_WIDTH = 95
+CODE_CHUNK_LINES = 100
 
-    Args:
-        md_text: Markdown content as string
 
-    Returns:
-        List of (type, content) tuples
+def _wrap_code_lines(lines, width=CODE_LINE_WIDTH):
     """
-    lines = md_text.split('\n')
-    elements = []
+    Wrap long code lines, yielding display lines one at a time
 
-    in_code_block = False
-    code_block_lines = []
-    code_block_lang = None
-    in_table = False
-    table_lines = []
+    Continuation lines are indented by two spaces and wrapped again if
+    they are still too long.
 
+    Args:
+        lines: Iterable of source code lines
+        width: Maximum number of characters per line
+
+    Yields:
+        Lines no longer than width
+    """
     for line in lines:
-        # Code blocks
-        if line.strip().startswith('```'):
-            if in_code_block:
-                # Closing code block
-                if code_block_lang == 'mermaid':
-                    elements.append(('mermaid', '\n'.join(code_block_lines)))
-                else:
-                    elements.append(('code', '\n'.join(code_block_lines)))
-                code_block_lines = []
-                code_block_lang = None
-                in_code_block = False
-            else:
-                # Opening code block - detect language
-                in_code_block = True
-                lang = line.strip()[3:].strip()
-                code_block_lang = lang if lang else None
-            continue
-
-        if in_code_block:
-            code_block_lines.append(line)
-            continue
-
-        # Tables
-        if '|' in line and line.strip():
-            if not in_table:
-                in_table = True
-                table_lines = []
-            table_lines.append(line)
-            continue
-        elif in_table:
-            elements.append(('table', table_lines))
-            table_lines = []
-            in_table = False
-
-        # Headers
-        if line.startswith('# '):
-            elements.append(('h1', line[2:].strip()))
-        elif line.startswith('## '):
-            elements.append(('h2', line[3:].strip()))
-        elif line.startswith('### '):
-            elements.append(('h3', line[4:].strip()))
-        elif line.startswith('#### '):
-            elements.append(('h4', line[5:].strip()))
-
-        # Lists
-        elif line.strip().startswith('- ') or line.strip().startswith('* '):
-            elements.append(('list', line.strip()[2:]))
-        elif re.match(r'^\d+\.\s', line.strip()):
-            elements.append(('numlist', re.sub(r'^\d+\.\s', '', line.strip())))
-
-        # Horizontal rule
-        elif line.strip() in ['---', '***', '___']:
-            elements.append(('hr', None))
-
-        # Paragraph
-        elif line.strip():
-            elements.append(('p', line.strip()))
-
-        # Empty line
-        else:
-            elements.append(('space', None))
+        while len(line) > width:
+            yield line[:width]
+            line = '  ' + line[width:]
+        yield line
 
-    # Close any open table
-    if in_table:
-        elements.append(('table', table_lines))
 
-    return elements
+# (size name, landscape?) -> (width, height), oriented once at import
+_PAGE_SIZES = {
+    (name, is_landscape): landscape(page_size) if is_landscape else portrait(page_size)
+    for name, page_size in (('a4', A4), ('a3', A3), ('letter', LETTER))
+    for is_landscape in (False, True)
+}
 
 
 def get_page_size(size='a4', orientation='portrait'):
@@ -313,18 +344,9 @@ def get_page_size(size='a4', orientation='portrait'):
     Returns:
         Tuple of (width, height) for the page size
     """
-    size_map = {
-        'a4': A4,
-        'a3': A3,
-        'letter': LETTER
-    }
-
-    page_size = size_map.get(size.lower(), A4)
-
-    if orientation.lower() == 'landscape':
-        return landscape(page_size)
-    else:
-        return portrait(page_size)
+    # Unknown sizes fall back to A4, unknown orientations to portrait
+    is_landscape = orientation.lower() == 'landscape'
+    return _PAGE_SIZES.get((size.lower(), is_landscape), _PAGE_SIZES[('a4', is_landscape)])
 
 
 def add_page_number(canvas, doc):
@@ -344,16 +366,244 @@ def add_page_number(canvas, doc):
     page_width = canvas._pagesize[0]
     canvas.drawCentredString(
         page_width / 2,  # x position (center of page)
-        1.5 * cm,        # y position (bottom margin)
+        PAGE_NUMBER_Y,   # y position (bottom margin)
         text
     )
     canvas.restoreState()
 
 
+# Base render size for Mermaid diagrams (multiplied by scale factor in mermaid.py)
+# With mermaid_scale=2-3, final PNG will be: width * scale
+# Example: 1200 * 2 = 2400px width for crisp rendering
+MERMAID_RENDER_WIDTH = 1200
+MERMAID_RENDER_HEIGHT = 1200
+
+
+def _is_table_separator(line):
+    """
+    Check for a table header separator row (|---|:---:|)
+
+    Only pipes, colons, dashes/equals and whitespace, with at least one
+    '---' or '==='. Plain string checks rather than a regex, which would
+    backtrack quadratically on long runs of these characters.
+    """
+    if '---' not in line and '===' not in line:
+        return False
+    return not ''.join(line.split()).strip(_TABLE_SEPARATOR_CHARS)
+
+
+def _render_mermaid_images(sources, scale, theme, use_cache):
+    """
+    Render all Mermaid diagrams of a document in one browser session
+
+    Args:
+        sources: List of Mermaid source strings
+        scale: Device scale factor for rendering
+        theme: Mermaid theme name
+        use_cache: Look up / store the PNGs in the on-disk Mermaid cache
+
+    Returns:
+        List with an image for each diagram, or None where rendering failed
+        Images are cache file paths, or in-memory PNG bytes without the cache
+    """
+    if use_cache:
+        return render_mermaid_cached_batch(sources, width=MERMAID_RENDER_WIDTH,
+                                           height=MERMAID_RENDER_HEIGHT, scale=scale, theme=theme)
+
+    return render_mermaid_to_bytes_batch(sources, width=MERMAID_RENDER_WIDTH,
+                                         height=MERMAID_RENDER_HEIGHT, scale=scale, theme=theme)
+
+
+def _diagram_flowables(source, image, styles, render=True):
+    """
+    Build the flowables showing one Mermaid diagram
+
+    Args:
+        source: Mermaid source of the diagram
+        image: Pre-rendered PNG (cache path or bytes), None if rendering failed
+        styles: Stylesheet from _build_styles()
+        render: False when Mermaid rendering is disabled or unavailable,
+                the source is then shown as a code block
+
+    Returns:
+        Tuple of (list of flowables, True if the rendered image is used)
+    """
+    if not render:
+        # Fallback: show as code block if Mermaid disabled or unavailable
+        return [Preformatted(source, styles['CustomCode'])], False
+
+    if not image:
+        # Fallback: show as code block
+        return [
+            Paragraph("<i>Mermaid diagram (rendering failed)</i>", styles['Normal']),
+            Preformatted(source[:500], styles['CustomCode'])
+        ], False
+
+    # Use custom HighQualityImage flowable to preserve full resolution
+    # HighQualityImage will automatically size itself to fit available width
+    try:
+        img = HighQualityImage(image)
+    except (OSError, ValueError, ZeroDivisionError) as e:
+        # Fallback on unreadable image data (missing file, not an image, empty image)
+        message = str(e).translate(_XML_ESCAPE_TABLE)
+        return [Paragraph(f"<i>Mermaid diagram (error: {message})</i>", styles['Normal'])], False
+
+    # Add spacing before and after for better visual separation
+    return [
+        Spacer(1, DIAGRAM_SPACE_BEFORE),  # Margin before diagram
+        img,
+        Spacer(1, DIAGRAM_SPACE_AFTER)    # Margin after diagram
+    ], True
+
+
+@functools.lru_cache(maxsize=16)
+def _parse_markdown_cached(markdown_text):
+    """
+    Parse markdown, reusing the result for text converted recently
+
+    Preview/watch workflows re-convert the same document over and over.
+    The returned elements are shared between calls and must not be modified.
+    """
+    return parse_markdown_with_stats(markdown_text)
+
+
+# Font files currently registered under each family name, and the
+# (family, files) combinations that failed to load
+_registered_font_families = {}
+_failed_font_families = set()
+
+
+def _register_font_family(font_family, regular, bold, mono):
+    """
+    Register a TrueType font family (regular, bold, mono) with ReportLab
+
+    Parsing TTF files is expensive, so each (family, files) combination is
+    loaded once per process; later conversions reuse the registered fonts
+    (or the remembered failure).
+
+    Returns:
+        True if all three fonts were registered, False otherwise
+    """
+    files = (regular, bold, mono)
+    if _registered_font_families.get(font_family) == files:
+        return True
+    if (font_family, files) in _failed_font_families:
+        return False
+
+    # Skip explicit paths that are not there (e.g. Windows font paths on Linux)
+    # instead of letting TTFont fail; bare file names are left to ReportLab's
+    # TTF search path
+    for path in files:
+        if ('/' in path or '\\' in path) and not os.path.isfile(path):
+            return False
+
+    try:
+        # Register individual fonts
+        pdfmetrics.registerFont(TTFont(f'{font_family}', regular))
+        pdfmetrics.registerFont(TTFont(f'{font_family}-Bold', bold))
+        pdfmetrics.registerFont(TTFont(f'{font_family}-Mono', mono))
+    except (TTFError, OSError):
+        _failed_font_families.add((font_family, files))
+        return False
+
+    # Register font family to enable automatic bold/italic switching
+    registerFontFamily(
+        font_family,
+        normal=font_family,
+        bold=f'{font_family}-Bold',
+        italic=font_family,  # Use regular for italic if not available
+        boldItalic=f'{font_family}-Bold'
+    )
+    _registered_font_families[font_family] = files
+    return True
+
+
+@functools.lru_cache(maxsize=8)
+def _build_styles(use_unicode_fonts, default_font, bold_font, mono_font):
+    """
+    Build the paragraph stylesheet for the given fonts
+
+    The stylesheet is cached per font combination, so batch conversions
+    build it only once. Callers must treat the returned stylesheet as
+    read-only.
+
+    Args:
+        use_unicode_fonts: Whether registered Unicode TTF fonts are in use
+        default_font: Font for body text
+        bold_font: Font for headings and bold text
+        mono_font: Font for code blocks
+
+    Returns:
+        ReportLab StyleSheet1 with the sample styles plus the custom ones
+    """
+    styles = getSampleStyleSheet()
+
+    # Update base Normal style for Unicode support
+    if use_unicode_fonts:
+        styles['Normal'].fontName = default_font
+        styles['Heading1'].fontName = bold_font
+        styles['Heading2'].fontName = bold_font
+        styles['Heading3'].fontName = bold_font
+        styles['Heading4'].fontName = bold_font
+
+    # Custom styles
+    styles.add(ParagraphStyle(
+        name='CustomH1',
+        parent=styles['Heading1'],
+        fontSize=20,
+        fontName=bold_font,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=12,
+        spaceBefore=12,
+        borderWidth=2,
+        borderColor=colors.HexColor('#3498db'),
+        borderPadding=8
+    ))
+
+    styles.add(ParagraphStyle(
+        name='CustomH2',
+        parent=styles['Heading2'],
+        fontSize=16,
+        fontName=bold_font,
+        textColor=colors.HexColor('#34495e'),
+        spaceAfter=10,
+        spaceBefore=10,
+        borderWidth=1,
+        borderColor=colors.HexColor('#95a5a6'),
+        borderPadding=6
+    ))
+
+    styles.add(ParagraphStyle(
+        name='CustomH3',
+        parent=styles['Heading3'],
+        fontSize=14,
+        fontName=bold_font,
+        textColor=colors.HexColor('#555555'),
+        spaceAfter=8,
+        spaceBefore=8
+    ))
+
+    styles.add(ParagraphStyle(
+        name='CustomCode',
+        parent=styles['Code'],
+        fontSize=7,
+        fontName=mono_font,
+        backgroundColor=colors.HexColor('#f8f8f8'),
+        borderWidth=1,
+        borderColor=colors.HexColor('#dddddd'),
+        borderPadding=8,
+        leftIndent=8,
+        rightIndent=8
+    ))
+
+    return styles
+
+
 def convert_markdown_to_pdf(markdown_text, output_path, title="Document",
                             enable_mermaid=True, page_numbers=True,
                             page_size='a4', orientation='portrait', font_name=None,
-                            mermaid_scale=2, mermaid_theme='default', emoji_strategy='auto'):
+                            mermaid_scale=2, mermaid_theme='default', emoji_strategy='auto',
+                            mermaid_cache=True):
     """
     Convert Markdown text to PDF
 
@@ -376,6 +626,8 @@ def convert_markdown_to_pdf(markdown_text, output_path, title="Document",
                        - 'pilmoji': Convert emoji to colored images (requires pilmoji)
                        - 'remove': Remove emoji, keep simple symbols (arrows, checkmarks)
                        - 'keep': Keep all emoji (requires Unicode font support)
+        mermaid_cache: Reuse previously rendered diagrams from the on-disk cache
+                       (default: True)
 
     Returns:
         dict with keys:
@@ -383,6 +635,7 @@ def convert_markdown_to_pdf(markdown_text, output_path, title="Document",
             - mermaid_count: Number of Mermaid diagrams found
             - mermaid_rendered: Number of Mermaid diagrams successfully rendered
             - playwright_available: Whether Playwright is available
+              (only checked when Mermaid rendering is enabled and diagrams are present)
     """
 
     # Register UTF-8 fonts if available
@@ -431,27 +684,10 @@ def convert_markdown_to_pdf(markdown_text, output_path, title="Document",
             ]
 
         for font_family, regular, bold, mono in font_attempts:
-            try:
-                # Register individual fonts
-                pdfmetrics.registerFont(TTFont(f'{font_family}', regular))
-                pdfmetrics.registerFont(TTFont(f'{font_family}-Bold', bold))
-                pdfmetrics.registerFont(TTFont(f'{font_family}-Mono', mono))
-
-                # Register font family to enable automatic bold/italic switching
-                from reportlab.pdfbase.pdfmetrics import registerFontFamily
-                registerFontFamily(
-                    font_family,
-                    normal=font_family,
-                    bold=f'{font_family}-Bold',
-                    italic=font_family,  # Use regular for italic if not available
-                    boldItalic=f'{font_family}-Bold'
-                )
-
+            if _register_font_family(font_family, regular, bold, mono):
                 use_unicode_fonts = True
                 unicode_font_name = font_family
                 break
-            except:
-                continue
 
     # Initialize emoji handler
     emoji_handler = None
@@ -463,12 +699,13 @@ def convert_markdown_to_pdf(markdown_text, output_path, title="Document",
             emoji_handler = None
 
     # Parse markdown
-    elements = parse_markdown(markdown_text)
+    elements, stats = _parse_markdown_cached(markdown_text)
 
     # Track Mermaid diagrams
-    mermaid_count = sum(1 for elem_type, _ in elements if elem_type == 'mermaid')
+    mermaid_count = stats['mermaid']
     mermaid_rendered = 0
-    playwright_available = is_playwright_available()
+    # Only probe for Playwright when there is something to render
+    playwright_available = is_playwright_available() if (enable_mermaid and mermaid_count) else False
 
     # Get page size with orientation
     final_pagesize = get_page_size(page_size, orientation)
@@ -477,79 +714,30 @@ def convert_markdown_to_pdf(markdown_text, output_path, title="Document",
     doc = SimpleDocTemplate(
         output_path,
         pagesize=final_pagesize,
-        rightMargin=2*cm,
-        leftMargin=2*cm,
-        topMargin=2*cm,
-        bottomMargin=2*cm
+        rightMargin=PAGE_MARGIN,
+        leftMargin=PAGE_MARGIN,
+        topMargin=PAGE_MARGIN,
+        bottomMargin=PAGE_MARGIN
     )
 
-    styles = getSampleStyleSheet()
-
     # Set default font based on Unicode support
     default_font = unicode_font_name if use_unicode_fonts else 'Helvetica'
     bold_font = f'{unicode_font_name}-Bold' if use_unicode_fonts else 'Helvetica-Bold'
     mono_font = f'{unicode_font_name}-Mono' if use_unicode_fonts else 'Courier'
 
-    # Update base Normal style for Unicode support
-    if use_unicode_fonts:
-        styles['Normal'].fontName = default_font
-        styles['Heading1'].fontName = bold_font
-        styles['Heading2'].fontName = bold_font
-        styles['Heading3'].fontName = bold_font
-        styles['Heading4'].fontName = bold_font
-
-    # Custom styles
-    styles.add(ParagraphStyle(
-        name='CustomH1',
-        parent=styles['Heading1'],
-        fontSize=20,
-        fontName=bold_font,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=12,
-        spaceBefore=12,
-        borderWidth=2,
-        borderColor=colors.HexColor('#3498db'),
-        borderPadding=8
-    ))
-
-    styles.add(ParagraphStyle(
-        name='CustomH2',
-        parent=styles['Heading2'],
-        fontSize=16,
-        fontName=bold_font,
-        textColor=colors.HexColor('#34495e'),
-        spaceAfter=10,
-        spaceBefore=10,
-        borderWidth=1,
-        borderColor=colors.HexColor('#95a5a6'),
-        borderPadding=6
-    ))
-
-    styles.add(ParagraphStyle(
-        name='CustomH3',
-        parent=styles['Heading3'],
-        fontSize=14,
-        fontName=bold_font,
-        textColor=colors.HexColor('#555555'),
-        spaceAfter=8,
-        spaceBefore=8
-    ))
-
-    styles.add(ParagraphStyle(
-        name='CustomCode',
-        parent=styles['Code'],
-        fontSize=7,
-        fontName=mono_font,
-        backgroundColor=colors.HexColor('#f8f8f8'),
-        borderWidth=1,
-        borderColor=colors.HexColor('#dddddd'),
-        borderPadding=8,
-        leftIndent=8,
-        rightIndent=8
-    ))
+    styles = _build_styles(use_unicode_fonts, default_font, bold_font, mono_font)
 
     story = []
-    temp_files = []  # Track temporary files for cleanup
+
+    # Render all Mermaid diagrams up front in a single browser session
+    # Maps element index -> PNG path (None if rendering failed)
+    render_diagrams = enable_mermaid and MERMAID_AVAILABLE and playwright_available
+    mermaid_images = {}
+    if render_diagrams and mermaid_count:
+        mermaid_indices = [idx for idx, (elem_type, _) in enumerate(elements) if elem_type == 'mermaid']
+        mermaid_paths = _render_mermaid_images([elements[idx][1] for idx in mermaid_indices],
+                                               mermaid_scale, mermaid_theme, mermaid_cache)
+        mermaid_images = dict(zip(mermaid_indices, mermaid_paths))
 
     # Calculate available width for images (page width minus margins)
     available_width = final_pagesize[0] - doc.leftMargin - doc.rightMargin
@@ -559,27 +747,28 @@ def convert_markdown_to_pdf(markdown_text, output_path, title="Document",
     while i < len(elements):
         elem_type, content = elements[i]
 
-        # Look ahead: if next non-space element is a mermaid diagram, group title with it
-        # Skip over any 'space' elements when looking ahead
-        next_idx = i + 1
-        while next_idx < len(elements) and elements[next_idx][0] == 'space':
-            next_idx += 1
-        next_is_diagram = (next_idx < len(elements) and elements[next_idx][0] == 'mermaid')
-        next_is_h3_or_h4 = (next_idx < len(elements) and elements[next_idx][0] in ['h3', 'h4'])
-
-        # For H2, look even further ahead to see if there's H3/H4 + diagram pattern
+        # Only H2-H4 titles are grouped with diagrams, so only they look ahead
+        next_is_diagram = False
         h2_has_nested_diagram = False
-        nested_h_idx = None
-        nested_diagram_idx = None
-        if elem_type == 'h2' and next_is_h3_or_h4:
-            # Found H2 → H3/H4, now check if H3/H4 → diagram
-            nested_h_idx = next_idx
-            check_idx = next_idx + 1
-            while check_idx < len(elements) and elements[check_idx][0] == 'space':
-                check_idx += 1
-            if check_idx < len(elements) and elements[check_idx][0] == 'mermaid':
-                h2_has_nested_diagram = True
-                nested_diagram_idx = check_idx
+        if elem_type in _GROUPABLE_HEADINGS:
+            # Look ahead: if next non-space element is a mermaid diagram, group title with it
+            # Skip over any 'space' elements when looking ahead
+            next_idx = i + 1
+            while next_idx < len(elements) and elements[next_idx][0] == 'space':
+                next_idx += 1
+            next_is_diagram = (next_idx < len(elements) and elements[next_idx][0] == 'mermaid')
+            next_is_h3_or_h4 = (next_idx < len(elements) and elements[next_idx][0] in ('h3', 'h4'))
+
+            # For H2, look even further ahead to see if there's H3/H4 + diagram pattern
+            if elem_type == 'h2' and next_is_h3_or_h4:
+                # Found H2 → H3/H4, now check if H3/H4 → diagram
+                nested_h_idx = next_idx
+                check_idx = next_idx + 1
+                while check_idx < len(elements) and elements[check_idx][0] == 'space':
+                    check_idx += 1
+                if check_idx < len(elements) and elements[check_idx][0] == 'mermaid':
+                    h2_has_nested_diagram = True
+                    nested_diagram_idx = check_idx
 
         if elem_type == 'h1':
             content = process_emoji(content, emoji_handler)
@@ -603,28 +792,10 @@ def convert_markdown_to_pdf(markdown_text, output_path, title="Document",
 
             # Add the diagram
             diagram_type, diagram_content = elements[nested_diagram_idx]
-            if enable_mermaid and MERMAID_AVAILABLE and playwright_available:
-                try:
-                    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                        tmp_path_png = tmp_file.name
-                    temp_files.append(tmp_path_png)
-
-                    render_width = 1200
-                    render_height = 1200
-
-                    if render_mermaid_to_png(diagram_content, tmp_path_png, width=render_width, height=render_height, scale=mermaid_scale, theme=mermaid_theme):
-                        group.append(Spacer(1, 0.3*cm))
-                        img = HighQualityImage(tmp_path_png)
-                        group.append(img)
-                        group.append(Spacer(1, 0.5*cm))
-                        mermaid_rendered += 1
-                    else:
-                        group.append(Paragraph("<i>Mermaid diagram (rendering failed)</i>", styles['Normal']))
-                        group.append(Preformatted(diagram_content[:500], styles['CustomCode']))
-                except Exception as e:
-                    group.append(Paragraph(f"<i>Mermaid diagram (error: {str(e)})</i>", styles['Normal']))
-            else:
-                group.append(Preformatted(diagram_content, styles['CustomCode']))
+            flowables, rendered = _diagram_flowables(diagram_content, mermaid_images.get(nested_diagram_idx),
+                                                     styles, render_diagrams)
+            group.extend(flowables)
+            mermaid_rendered += rendered
 
             # Wrap in KeepTogether to prevent page breaks
             story.append(KeepTogether(group))
@@ -649,28 +820,10 @@ def convert_markdown_to_pdf(markdown_text, output_path, title="Document",
             diagram_type, diagram_content = elements[next_idx]
 
             # Render diagram and add to group
-            if enable_mermaid and MERMAID_AVAILABLE and playwright_available:
-                try:
-                    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                        tmp_path_png = tmp_file.name
-                    temp_files.append(tmp_path_png)
-
-                    render_width = 1200
-                    render_height = 1200
-
-                    if render_mermaid_to_png(diagram_content, tmp_path_png, width=render_width, height=render_height, scale=mermaid_scale, theme=mermaid_theme):
-                        group.append(Spacer(1, 0.3*cm))
-                        img = HighQualityImage(tmp_path_png)
-                        group.append(img)
-                        group.append(Spacer(1, 0.5*cm))
-                        mermaid_rendered += 1
-                    else:
-                        group.append(Paragraph("<i>Mermaid diagram (rendering failed)</i>", styles['Normal']))
-                        group.append(Preformatted(diagram_content[:500], styles['CustomCode']))
-                except Exception as e:
-                    group.append(Paragraph(f"<i>Mermaid diagram (error: {str(e)})</i>", styles['Normal']))
-            else:
-                group.append(Preformatted(diagram_content, styles['CustomCode']))
+            flowables, rendered = _diagram_flowables(diagram_content, mermaid_images.get(next_idx),
+                                                     styles, render_diagrams)
+            group.extend(flowables)
+            mermaid_rendered += rendered
 
             # Wrap in KeepTogether to prevent page breaks between title and diagram
             story.append(KeepTogether(group))
@@ -689,127 +842,52 @@ def convert_markdown_to_pdf(markdown_text, output_path, title="Document",
             story.append(Paragraph(content, styles['Heading4']))
             i += 1
 
-        elif elem_type == 'p':
-            # Handle inline formatting
-            # Process emoji first
-            content = process_emoji(content, emoji_handler)
-            # Remove hyperlinks
-            content = remove_hyperlinks(content)
-            # Escape XML special characters
-            content = content.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            # Apply markdown formatting
-            content = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', content)
-            content = re.sub(r'`(.+?)`', r'<font face="courier" color="#666666">\1</font>', content)
-            story.append(Paragraph(content, styles['Normal']))
-            i += 1
-
-        elif elem_type == 'list':
-            # Handle inline formatting
+        elif elem_type in _TEXT_PREFIXES:
+            # Paragraphs and list items share the same inline formatting,
+            # only the bullet/indent prefix differs
             # Process emoji first
             content = process_emoji(content, emoji_handler)
             # Remove hyperlinks
             content = remove_hyperlinks(content)
-            # Escape XML special characters
-            content = content.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            # Apply markdown formatting
-            content = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', content)
-            content = re.sub(r'`(.+?)`', r'<font face="courier" color="#666666">\1</font>', content)
-            story.append(Paragraph(f"&#8226; {content}", styles['Normal']))
-            i += 1
-
-        elif elem_type == 'numlist':
-            # Handle inline formatting
-            # Process emoji first
-            content = process_emoji(content, emoji_handler)
-            # Remove hyperlinks
-            content = remove_hyperlinks(content)
-            # Escape XML special characters
-            content = content.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            # Apply markdown formatting
-            content = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', content)
-            content = re.sub(r'`(.+?)`', r'<font face="courier" color="#666666">\1</font>', content)
-            story.append(Paragraph(f"  {content}", styles['Normal']))
+            # Escape XML special characters and apply markdown formatting
+            content = _format_inline(content)
+            story.append(Paragraph(_TEXT_PREFIXES[elem_type] + content, styles['Normal']))
             i += 1
 
         elif elem_type == 'mermaid':
             # Standalone mermaid diagram (no preceding title)
-            # Render Mermaid diagram as ultra high-resolution PNG
-            if enable_mermaid and MERMAID_AVAILABLE and playwright_available:
-                try:
-                    # Use PNG with VERY high resolution for crisp rendering
-                    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                        tmp_path_png = tmp_file.name
-                    temp_files.append(tmp_path_png)
-
-                    # Render Mermaid at high resolution for PDF clarity
-                    # Target width for diagrams when displayed in PDF (in pixels)
-                    # With mermaid_scale=2-3, final PNG will be: width * scale
-                    # Example: 1200 * 2 = 2400px width for crisp rendering
-                    render_width = 1200  # Base width, multiplied by scale factor in mermaid.py
-                    render_height = 1200  # Base height for viewport
-
-                    if render_mermaid_to_png(content, tmp_path_png, width=render_width, height=render_height, scale=mermaid_scale, theme=mermaid_theme):
-                        # Use custom HighQualityImage flowable to preserve full resolution
-                        # HighQualityImage will automatically size itself to fit available width
-                        # Add spacing before and after for better visual separation
-                        story.append(Spacer(1, 0.3*cm))  # Margin before diagram
-                        img = HighQualityImage(tmp_path_png)
-                        story.append(img)
-                        story.append(Spacer(1, 0.5*cm))  # Margin after diagram
-                        mermaid_rendered += 1
-                    else:
-                        # Fallback: show as code block
-                        story.append(Paragraph("<i>Mermaid diagram (rendering failed)</i>", styles['Normal']))
-                        story.append(Preformatted(content[:500], styles['CustomCode']))
-                except Exception as e:
-                    # Fallback on error
-                    story.append(Paragraph(f"<i>Mermaid diagram (error: {str(e)})</i>", styles['Normal']))
-            else:
-                # Fallback: show as code block if Mermaid disabled or unavailable
-                story.append(Preformatted(content, styles['CustomCode']))
+            # Diagram was pre-rendered at high resolution for PDF clarity
+            flowables, rendered = _diagram_flowables(content, mermaid_images.get(i),
+                                                     styles, render_diagrams)
+            story.extend(flowables)
+            mermaid_rendered += rendered
             i += 1
 
         elif elem_type == 'code':
             # Code blocks with automatic chunking
-            lines = content.split('\n')
-            formatted_lines = []
-            for line in lines:
-                if len(line) > 95:
-                    # Wrap long lines
-                    formatted_lines.append(line[:95])
-                    formatted_lines.append('  ' + line[95:])
+            # Long lines are wrapped and chunks are consumed as they are produced
+            code_lines = _wrap_code_lines(content.split('\n'))
+            chunks = iter(lambda: list(islice(code_lines, CODE_CHUNK_LINES)), [])
+            for chunk_idx, chunk in enumerate(chunks):
+                code_block = Preformatted('\n'.join(chunk), styles['CustomCode'])
+                if chunk_idx:
+                    story.extend((Spacer(1, CODE_CHUNK_SPACE), code_block))
                 else:
-                    formatted_lines.append(line)
-
-            # Split into chunks for large code blocks
-            MAX_LINES = 100
-            for chunk_idx in range(0, len(formatted_lines), MAX_LINES):
-                chunk = formatted_lines[chunk_idx:chunk_idx+MAX_LINES]
-                code_text = '\n'.join(chunk)
-                story.append(Preformatted(code_text, styles['CustomCode']))
-                if chunk_idx + MAX_LINES < len(formatted_lines):
-                    story.append(Spacer(1, 0.1*cm))
+                    story.append(code_block)
             i += 1
 
         elif elem_type == 'table':
             # Parse table
             table_data = []
             for line in content:
-                if '---' in line or '===' in line:
+                # Skip header separator rows (|---|:---:|), but not cells containing '---'
+                if _is_table_separator(line):
                     continue
-                cells = [cell.strip() for cell in line.split('|') if cell.strip()]
+                cells = [cell for cell in (cell.strip() for cell in line.split('|')) if cell]
                 if cells:
                     # Process markdown formatting in each cell
-                    processed_cells = []
-                    for cell in cells:
-                        # Escape XML special characters first
-                        cell = cell.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                        # Apply markdown formatting
-                        cell = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', cell)
-                        cell = re.sub(r'`(.+?)`', r'<font face="courier" color="#666666">\1</font>', cell)
-                        # Convert to Paragraph for ReportLab to process formatting
-                        processed_cells.append(Paragraph(cell, styles['Normal']))
-                    table_data.append(processed_cells)
+                    # Convert to Paragraph for ReportLab to process formatting
+                    table_data.append([Paragraph(_format_inline(cell), styles['Normal']) for cell in cells])
 
             if table_data:
                 t = Table(table_data)
@@ -828,13 +906,11 @@ def convert_markdown_to_pdf(markdown_text, output_path, title="Document",
             i += 1
 
         elif elem_type == 'hr':
-            story.append(Spacer(1, 0.3*cm))
-            story.append(Paragraph('<hr/>', styles['Normal']))
-            story.append(Spacer(1, 0.3*cm))
+            story.extend((Spacer(1, HR_SPACE), Paragraph('<hr/>', styles['Normal']), Spacer(1, HR_SPACE)))
             i += 1
 
         elif elem_type == 'space':
-            story.append(Spacer(1, 0.2*cm))
+            story.append(Spacer(1, BLANK_LINE_SPACE))
             i += 1
 
         else:
@@ -847,13 +923,6 @@ def convert_markdown_to_pdf(markdown_text, output_path, title="Document",
     else:
         doc.build(story)
 
-    # Cleanup temporary files
-    for tmp_file in temp_files:
-        try:
-            os.unlink(tmp_file)
-        except:
-            pass
-
     # Cleanup emoji handler temporary files
     if emoji_handler:
         try:
@@ -5,9 +5,115 @@ Provides multiple strategies for rendering emoji in PDFs
 """
 
 import re
+import shutil
 import tempfile
 import os
-from typing import Optional, Tuple, List
+import functools
+import itertools
+from typing import Optional, Tuple, List, Dict
+
+
+# Unique emoji image names when several texts share one directory
+_image_counter = itertools.count()
+
+# Emoji detected by detect_emoji() (runs of consecutive emoji are one match)
+_EMOJI_RE = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    "\U00002702-\U000027B0"  # dingbats
+    "\U000024C2-\U0001F251"  # enclosed characters
+    "\U0001F900-\U0001F9FF"  # supplemental symbols
+    "\U00002600-\U000026FF"  # misc symbols
+    "\U00002700-\U000027BF"  # dingbats
+    "\U0001F018-\U0001F270"  # various symbols
+    "\U0000231A-\U0000231B"  # watches
+    "\U000023E9-\U000023FA"  # av symbols
+    "\U000025AA-\U000025FE"  # geometric shapes
+    "\U00002B05-\U00002B07"  # arrows
+    "\U00002934-\U00002935"  # arrows
+    "\U00003030"              # wavy dash
+    "\U0000303D"              # part alternation mark
+    "\U00003297"              # circled ideograph
+    "\U00003299"              # circled ideograph
+    "\U0001F170-\U0001F251"  # enclosed alphanumerics
+    "]+",
+    flags=re.UNICODE
+)
+
+# Simple arrows (commonly supported)
+_SIMPLE_ARROWS = (
+    0x2190, 0x2191, 0x2192, 0x2193,  # ← ↑ → ↓
+    0x2194, 0x2195,                   # ↔ ↕
+    0x21D0, 0x21D1, 0x21D2, 0x21D3,  # ⇐ ⇑ ⇒ ⇓
+    0x21D4, 0x21D5,                   # ⇔ ⇕
+    0x2934, 0x2935,                   # ⤴ ⤵
+    0x2B05, 0x2B06, 0x2B07,          # ⬅ ⬆ ⬇
+)
+
+# Math and technical symbols
+_TECHNICAL_SYMBOLS = (
+    0x00D7,  # ×
+    0x00F7,  # ÷
+    0x2212,  # −
+    0x2260,  # ≠
+    0x2264,  # ≤
+    0x2265,  # ≥
+    0x221E,  # ∞
+)
+
+# Checkmarks, X marks, and boxes (basic forms used in markdown)
+_BASIC_CHECKS = (
+    0x2713,  # ✓ checkmark
+    0x2714,  # ✔ heavy checkmark
+    0x2717,  # ✗ ballot X
+    0x2718,  # ✘ heavy ballot X
+    0x2610,  # ☐ ballot box
+    0x2611,  # ☑ ballot box with check
+    0x2612,  # ☒ ballot box with X
+)
+
+# Stars and basic geometric shapes
+_BASIC_SHAPES = (
+    0x2605,  # ★ black star
+    0x2606,  # ☆ white star
+    0x25A0,  # ■ black square
+    0x25A1,  # □ white square
+    0x25B2,  # ▲ black up-pointing triangle
+    0x25B3,  # △ white up-pointing triangle
+    0x25BC,  # ▼ black down-pointing triangle
+    0x25BD,  # ▽ white down-pointing triangle
+    0x25C6,  # ◆ black diamond
+    0x25C7,  # ◇ white diamond
+)
+
+# Codepoints that is_simple_symbol() leaves as text
+# Note: ✅ (0x2705) is NOT included here because it's typically rendered
+# as a colorful emoji. We want to convert it to an image for color support.
+_SIMPLE_SYMBOLS = frozenset(
+    _SIMPLE_ARROWS + _TECHNICAL_SYMBOLS + _BASIC_CHECKS + _BASIC_SHAPES
+)
+
+# Codepoint ranges removed by remove_unsupported_emoji() (simplified heuristic)
+_UNSUPPORTED_EMOJI_RANGES = (
+    (0x1F300, 0x1F9FF),  # Misc symbols and pictographs
+    (0x2600, 0x26FF),    # Misc symbols
+    (0x2700, 0x27BF),    # Dingbats
+    (0x1F600, 0x1F64F),  # Emoticons
+    (0x1F680, 0x1F6FF),  # Transport and map symbols
+    (0x2300, 0x23FF),    # Miscellaneous Technical
+    (0xFE00, 0xFE0F),    # Variation selectors
+)
+
+# str.translate() tables deleting those ranges, with and without the simple symbols
+_UNSUPPORTED_EMOJI_TABLE = dict.fromkeys(
+    cp for lo, hi in _UNSUPPORTED_EMOJI_RANGES for cp in range(lo, hi + 1)
+)
+_UNSUPPORTED_EMOJI_TABLE_KEEP_SYMBOLS = {
+    cp: None for cp in _UNSUPPORTED_EMOJI_TABLE if cp not in _SIMPLE_SYMBOLS
+}
 
 
 def detect_emoji(text: str) -> List[Tuple[str, int, int]]:
@@ -20,37 +126,12 @@ def detect_emoji(text: str) -> List[Tuple[str, int, int]]:
     Returns:
         List of (emoji_char, start_pos, end_pos) tuples
     """
-    if not text:
+    # Every emoji is outside ASCII: plain text needs no regex scan
+    if not text or text.isascii():
         return []
 
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # emoticons
-        "\U0001F300-\U0001F5FF"  # symbols & pictographs
-        "\U0001F680-\U0001F6FF"  # transport & map symbols
-        "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-        "\U00002702-\U000027B0"  # dingbats
-        "\U000024C2-\U0001F251"  # enclosed characters
-        "\U0001F900-\U0001F9FF"  # supplemental symbols
-        "\U00002600-\U000026FF"  # misc symbols
-        "\U00002700-\U000027BF"  # dingbats
-        "\U0001F018-\U0001F270"  # various symbols
-        "\U0000231A-\U0000231B"  # watches
-        "\U000023E9-\U000023FA"  # av symbols
-        "\U000025AA-\U000025FE"  # geometric shapes
-        "\U00002B05-\U00002B07"  # arrows
-        "\U00002934-\U00002935"  # arrows
-        "\U00003030"              # wavy dash
-        "\U0000303D"              # part alternation mark
-        "\U00003297"              # circled ideograph
-        "\U00003299"              # circled ideograph
-        "\U0001F170-\U0001F251"  # enclosed alphanumerics
-        "]+",
-        flags=re.UNICODE
-    )
-
     results = []
-    for match in emoji_pattern.finditer(text):
+    for match in _EMOJI_RE.finditer(text):
         results.append((match.group(), match.start(), match.end()))
 
     return results
@@ -69,61 +150,59 @@ def is_simple_symbol(char: str) -> bool:
     Returns:
         True if it's a simple symbol that should not be treated as emoji
     """
-    codepoint = ord(char)
-
-    # Simple arrows (commonly supported)
-    simple_arrows = [
-        0x2190, 0x2191, 0x2192, 0x2193,  # ← ↑ → ↓
-        0x2194, 0x2195,                   # ↔ ↕
-        0x21D0, 0x21D1, 0x21D2, 0x21D3,  # ⇐ ⇑ ⇒ ⇓
-        0x21D4, 0x21D5,                   # ⇔ ⇕
-        0x2934, 0x2935,                   # ⤴ ⤵
-        0x2B05, 0x2B06, 0x2B07,          # ⬅ ⬆ ⬇
-    ]
-
-    # Math and technical symbols
-    technical_symbols = [
-        0x00D7,  # ×
-        0x00F7,  # ÷
-        0x2212,  # −
-        0x2260,  # ≠
-        0x2264,  # ≤
-        0x2265,  # ≥
-        0x221E,  # ∞
-    ]
-
-    # Checkmarks, X marks, and boxes (basic forms used in markdown)
-    basic_checks = [
-        0x2713,  # ✓ checkmark
-        0x2714,  # ✔ heavy checkmark
-        0x2717,  # ✗ ballot X
-        0x2718,  # ✘ heavy ballot X
-        0x2610,  # ☐ ballot box
-        0x2611,  # ☑ ballot box with check
-        0x2612,  # ☒ ballot box with X
-    ]
-
-    # Stars and basic geometric shapes
-    basic_shapes = [
-        0x2605,  # ★ black star
-        0x2606,  # ☆ white star
-        0x25A0,  # ■ black square
-        0x25A1,  # □ white square
-        0x25B2,  # ▲ black up-pointing triangle
-        0x25B3,  # △ white up-pointing triangle
-        0x25BC,  # ▼ black down-pointing triangle
-        0x25BD,  # ▽ white down-pointing triangle
-        0x25C6,  # ◆ black diamond
-        0x25C7,  # ◇ white diamond
-    ]
-
-    # Note: ✅ (0x2705) is NOT included here because it's typically rendered
-    # as a colorful emoji. We want to convert it to an image for color support.
-
-    return codepoint in simple_arrows + technical_symbols + basic_checks + basic_shapes
-
-
-def try_pilmoji_conversion(text: str) -> Optional[Tuple[str, List[str]]]:
+    return ord(char) in _SIMPLE_SYMBOLS
+
+
+# Font size for emoji rendering (needs to be large for good quality)
+EMOJI_IMAGE_SIZE = 72  # 72pt for good quality
+
+
+@functools.lru_cache(maxsize=1)
+def _load_pilmoji():
+    """
+    Import Pilmoji and Pillow once.
+
+    Returns:
+        (Pilmoji, Image) tuple, or None if Pilmoji is not installed
+    """
+    try:
+        from pilmoji import Pilmoji
+        from PIL import Image
+    except ImportError:
+        return None
+    return Pilmoji, Image
+
+
+@functools.lru_cache(maxsize=1)
+def _emoji_font():
+    """Font passed to Pilmoji for emoji images, loaded once per process."""
+    from PIL import ImageFont
+    if os.name == 'nt':
+        return ImageFont.truetype("arial.ttf", EMOJI_IMAGE_SIZE)
+    return ImageFont.load_default()
+
+
+def _render_emoji_image(emoji_char: str, temp_dir: str) -> str:
+    """Render one emoji to a PNG file in temp_dir and return its path."""
+    Pilmoji, Image = _load_pilmoji()
+
+    # Create a small image for the emoji
+    img = Image.new('RGBA', (EMOJI_IMAGE_SIZE, EMOJI_IMAGE_SIZE), (255, 255, 255, 0))
+
+    # Use Pilmoji to render the emoji
+    with Pilmoji(img) as pilmoji:
+        # Draw emoji at position (0, 0)
+        pilmoji.text((0, 0), emoji_char, fill=(0, 0, 0, 255), font=_emoji_font())
+
+    # Save to temporary file
+    img_path = os.path.join(temp_dir, f'emoji_{next(_image_counter)}.png')
+    img.save(img_path, 'PNG')
+    return img_path
+
+
+def try_pilmoji_conversion(text: str,
+                           temp_dir: Optional[str] = None,
+                           rendered: Optional[Dict[str, str]] = None) -> Optional[Tuple[str, List[str]]]:
     """
     Try to convert emoji to inline images using Pilmoji.
 
@@ -134,65 +213,54 @@ def try_pilmoji_conversion(text: str) -> Optional[Tuple[str, List[str]]]:
 
     Args:
         text: Text containing emoji
+        temp_dir: Existing directory to write the emoji images to
+                  (default: a new temporary directory)
+        rendered: Emoji already written to temp_dir, mapped to their image
+                  paths; reused and updated so each emoji is rendered once
 
     Returns:
         Tuple of (modified_text, [image_paths]) if successful, None if Pilmoji unavailable
-        Image paths are temporary files that should be cleaned up by caller
+        Image paths are the temporary files created by this call, which
+        should be cleaned up by caller
     """
-    try:
-        from pilmoji import Pilmoji
-        from PIL import Image, ImageFont, ImageDraw
-    except ImportError:
+    if _load_pilmoji() is None:
         return None
 
-    emoji_list = detect_emoji(text)
-    if not emoji_list:
+    if text.isascii() or not _EMOJI_RE.search(text):
         return text, []
 
     # Create temporary directory for emoji images
-    temp_dir = tempfile.mkdtemp(prefix='md2pdf_emoji_')
+    if temp_dir is None:
+        temp_dir = tempfile.mkdtemp(prefix='md2pdf_emoji_')
     image_paths = []
-    modified_text = text
-    offset = 0  # Track position changes due to replacements
+    if rendered is None:
+        rendered = {}
 
-    # Font size for emoji rendering (needs to be large for good quality)
-    emoji_size = 72  # 72pt for good quality
+    def replace_emoji(match):
+        emoji_char = match.group()
 
-    for emoji_char, start, end in emoji_list:
         # Skip simple symbols that don't need image conversion
         if len(emoji_char) == 1 and is_simple_symbol(emoji_char):
-            continue
-
-        try:
-            # Create a small image for the emoji
-            img = Image.new('RGBA', (emoji_size, emoji_size), (255, 255, 255, 0))
-
-            # Use Pilmoji to render the emoji
-            with Pilmoji(img) as pilmoji:
-                # Draw emoji at position (0, 0)
-                pilmoji.text((0, 0), emoji_char, fill=(0, 0, 0, 255),
-                           font=ImageFont.truetype("arial.ttf", emoji_size) if os.name == 'nt'
-                           else ImageFont.load_default())
-
-            # Save to temporary file
-            img_path = os.path.join(temp_dir, f'emoji_{len(image_paths)}.png')
-            img.save(img_path, 'PNG')
-            image_paths.append(img_path)
+            return emoji_char
 
-            # Create placeholder for ReportLab
-            # We'll use a special marker that converter.py can recognize
-            placeholder = f'<img src="{img_path}" width="12" height="12" valign="middle"/>'
+        # Repeated emoji share the image written the first time
+        img_path = rendered.get(emoji_char)
+        if img_path is None:
+            try:
+                img_path = _render_emoji_image(emoji_char, temp_dir)
+            except Exception as e:
+                # If rendering fails, leave the emoji as-is
+                print(f"Warning: Failed to render emoji {emoji_char}: {e}")
+                return emoji_char
+            rendered[emoji_char] = img_path
+            image_paths.append(img_path)
 
-            # Replace emoji with placeholder
-            adj_start = start + offset
-            adj_end = end + offset
-            modified_text = modified_text[:adj_start] + placeholder + modified_text[adj_end:]
-            offset += len(placeholder) - (end - start)
+        # Create placeholder for ReportLab
+        # We'll use a special marker that converter.py can recognize
+        return f'<img src="{img_path}" width="12" height="12" valign="middle"/>'
 
-        except Exception as e:
-            # If rendering fails, leave the emoji as-is
-            print(f"Warning: Failed to render emoji {emoji_char}: {e}")
-            continue
+    # Replace every emoji run with its placeholder in a single pass
+    modified_text = _EMOJI_RE.sub(replace_emoji, text)
 
     return modified_text, image_paths
 
@@ -210,33 +278,12 @@ def remove_unsupported_emoji(text: str, keep_simple_symbols: bool = True) -> str
     Returns:
         Text with unsupported emoji removed
     """
-    if not text:
+    if not text or text.isascii():
         return text
 
-    result = []
-    for char in text:
-        codepoint = ord(char)
-
-        # Keep simple symbols if requested
-        if keep_simple_symbols and is_simple_symbol(char):
-            result.append(char)
-            continue
-
-        # Check if character is an emoji (simplified heuristic)
-        is_emoji = (
-            (codepoint >= 0x1F300 and codepoint <= 0x1F9FF) or  # Misc symbols and pictographs
-            (codepoint >= 0x2600 and codepoint <= 0x26FF) or    # Misc symbols
-            (codepoint >= 0x2700 and codepoint <= 0x27BF) or    # Dingbats
-            (codepoint >= 0x1F600 and codepoint <= 0x1F64F) or  # Emoticons
-            (codepoint >= 0x1F680 and codepoint <= 0x1F6FF) or  # Transport and map symbols
-            (codepoint >= 0x2300 and codepoint <= 0x23FF) or    # Miscellaneous Technical
-            (codepoint >= 0xFE00 and codepoint <= 0xFE0F)       # Variation selectors
-        )
-
-        if not is_emoji:
-            result.append(char)
-
-    return ''.join(result)
+    if keep_simple_symbols:
+        return text.translate(_UNSUPPORTED_EMOJI_TABLE_KEEP_SYMBOLS)
+    return text.translate(_UNSUPPORTED_EMOJI_TABLE)
 
 
 class EmojiHandler:
@@ -258,6 +305,22 @@ class EmojiHandler:
         """
         self.strategy = strategy
         self.temp_files = []
+        self._temp_dir = None
+        self._emoji_images = {}
+
+    def _convert_with_pilmoji(self, text: str) -> Optional[str]:
+        """Run Pilmoji conversion, writing all images to one temporary directory."""
+        if text.isascii():
+            # No emoji to convert, so no directory is needed
+            return text if _load_pilmoji() is not None else None
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.mkdtemp(prefix='md2pdf_emoji_')
+        result = try_pilmoji_conversion(text, self._temp_dir, self._emoji_images)
+        if result is None:
+            return None
+        modified_text, temp_files = result
+        self.temp_files.extend(temp_files)
+        return modified_text
 
     def process_text(self, text: str) -> str:
         """
@@ -271,20 +334,16 @@ class EmojiHandler:
         """
         if self.strategy == 'auto':
             # Try strategies in order of preference
-            result = try_pilmoji_conversion(text)
-            if result:
-                modified_text, temp_files = result
-                self.temp_files.extend(temp_files)
+            modified_text = self._convert_with_pilmoji(text)
+            if modified_text is not None:
                 return modified_text
 
             # Fallback to removal with simple symbols preserved
             return remove_unsupported_emoji(text, keep_simple_symbols=True)
 
         elif self.strategy == 'pilmoji':
-            result = try_pilmoji_conversion(text)
-            if result:
-                modified_text, temp_files = result
-                self.temp_files.extend(temp_files)
+            modified_text = self._convert_with_pilmoji(text)
+            if modified_text is not None:
                 return modified_text
             else:
                 raise RuntimeError("Pilmoji is not installed. Install with: pip install pilmoji")
@@ -307,18 +366,10 @@ class EmojiHandler:
 
     def cleanup(self):
         """Clean up temporary files created during emoji conversion."""
-        for file_path in self.temp_files:
-            try:
-                os.unlink(file_path)
-            except:
-                pass
-
-        # Also try to remove temp directories
-        temp_dirs = set(os.path.dirname(f) for f in self.temp_files)
-        for temp_dir in temp_dirs:
-            try:
-                os.rmdir(temp_dir)
-            except:
-                pass
+        # All images live in one directory: remove it in one go
+        if self._temp_dir is not None:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
 
         self.temp_files.clear()
+        self._emoji_images.clear()
@@ -8,55 +8,79 @@ import tempfile
 import os
 import re
 import base64
+import shutil
+import hashlib
+import threading
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Optional
 import markdown
 
 
-def _process_mermaid_diagrams(markdown_text: str) -> Tuple[str, List[str]]:
+# Fenced Mermaid blocks replaced by rendered images before Markdown conversion
+_MERMAID_RE = re.compile(r'```mermaid\n(.*?)\n```', re.DOTALL)
+
+# Generated PDFs kept in the on-disk cache; least recently used go first
+MAX_PDF_CACHE_ENTRIES = 32
+
+
+# Per-thread Markdown converter: instances keep state while converting
+_converters = threading.local()
+
+
+def _markdown_converter() -> markdown.Markdown:
+    """Markdown converter shared by all conversions in this thread (reset before each use)"""
+    md = getattr(_converters, 'md', None)
+    if md is None:
+        md = _converters.md = markdown.Markdown(extensions=[
+            'extra',          # Tables, fenced code, etc.
+            'codehilite',     # Syntax highlighting
+            'toc',            # Table of contents
+            'nl2br',          # Newlines to <br>
+            'fenced_code',    # Fenced code blocks
+        ])
+    return md
+
+
+def _process_mermaid_diagrams(markdown_text: str, use_cache: bool = True) -> str:
     """
     Find and render Mermaid diagrams, replace with <img> tags.
 
     Args:
         markdown_text: Markdown content with potential Mermaid blocks
+        use_cache: Reuse previously rendered diagrams from the on-disk cache
 
     Returns:
-        Tuple of (modified_markdown, list_of_temp_image_paths)
+        Markdown with rendered diagrams inlined as base64 images
     """
-    temp_images = []
-
     try:
-        from .mermaid import render_mermaid_to_png, is_playwright_available
+        from .mermaid import render_mermaid_to_bytes_batch, render_mermaid_cached_batch, is_playwright_available
 
         if not is_playwright_available():
             # Playwright not available, return unchanged
-            return markdown_text, temp_images
+            return markdown_text
 
         # Find all Mermaid code blocks
-        pattern = r'```mermaid\n(.*?)\n```'
-        matches = list(re.finditer(pattern, markdown_text, re.DOTALL))
+        matches = list(_MERMAID_RE.finditer(markdown_text))
+        if not matches:
+            return markdown_text
+
+        # Render all diagrams to PNG in a single browser session
+        # Use wider canvas but let height auto-calculate to avoid layout errors
+        # Without the cache, PNG data stays in memory instead of temp files
+        mermaid_codes = [match.group(1) for match in matches]
+        render_batch = render_mermaid_cached_batch if use_cache else render_mermaid_to_bytes_batch
+        images = render_batch(mermaid_codes, width=1400, height=2000, scale=2, theme='default')
 
         # Process in reverse to maintain positions
-        for match in reversed(matches):
-            mermaid_code = match.group(1)
-
-            # Create temporary PNG file
-            tmp_file = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-            tmp_path = tmp_file.name
-            tmp_file.close()
-            temp_images.append(tmp_path)
-
-            # Render Mermaid to PNG
-            # Use wider canvas but let height auto-calculate to avoid layout errors
-            success = render_mermaid_to_png(
-                mermaid_code, tmp_path,
-                width=1400, height=2000, scale=2, theme='default'
-            )
+        for match, image in reversed(list(zip(matches, images))):
+            success = image is not None
 
             if success:
                 # Convert image to base64 for embedding
-                with open(tmp_path, 'rb') as img_file:
-                    img_data = base64.b64encode(img_file.read()).decode('utf-8')
+                if isinstance(image, str):
+                    with open(image, 'rb') as img_file:
+                        image = img_file.read()
+                img_data = base64.b64encode(image).decode('utf-8')
 
                 # Replace Mermaid block with inline image
                 # Limit height to 75% of page height (matching ReportLab logic)
@@ -75,11 +99,12 @@ def _process_mermaid_diagrams(markdown_text: str) -> Tuple[str, List[str]]:
     except Exception as e:
         print(f"Warning: Failed to process Mermaid diagrams: {e}")
 
-    return markdown_text, temp_images
+    return markdown_text
 
 
 def markdown_to_html(markdown_text: str, title: str = "Document",
-                     enable_mermaid: bool = True) -> str:
+                     enable_mermaid: bool = True,
+                     mermaid_cache: bool = True) -> str:
     """
     Convert Markdown to HTML with proper styling for PDF.
 
@@ -87,24 +112,17 @@ def markdown_to_html(markdown_text: str, title: str = "Document",
         markdown_text: Markdown content
         title: Document title
         enable_mermaid: Enable Mermaid diagram rendering
+        mermaid_cache: Reuse previously rendered diagrams from the on-disk cache
 
     Returns:
         Complete HTML document with CSS
     """
     # Pre-process Mermaid diagrams if enabled
-    temp_images = []
     if enable_mermaid:
-        markdown_text, temp_images = _process_mermaid_diagrams(markdown_text)
-
-    # Convert markdown to HTML
-    md = markdown.Markdown(extensions=[
-        'extra',          # Tables, fenced code, etc.
-        'codehilite',     # Syntax highlighting
-        'toc',            # Table of contents
-        'nl2br',          # Newlines to <br>
-        'fenced_code',    # Fenced code blocks
-    ])
-    content_html = md.convert(markdown_text)
+        markdown_text = _process_mermaid_diagrams(markdown_text, mermaid_cache)
+
+    # Convert markdown to HTML, reusing the converter and its extensions
+    content_html = _markdown_converter().reset().convert(markdown_text)
 
     # Create complete HTML document with nice styling
     html = f"""<!DOCTYPE html>
@@ -276,9 +294,26 @@ def markdown_to_html(markdown_text: str, title: str = "Document",
     return html
 
 
+async def _print_pdf(browser, html_path: str, pdf_options: dict) -> None:
+    """Print an HTML file to PDF in a new page of a running browser."""
+    page = await browser.new_page()
+    try:
+        # Load HTML file (a real file, so absolute file:// images still load)
+        await page.goto(f'file://{os.path.abspath(html_path)}')
+
+        # Wait for any dynamic content
+        await page.wait_for_load_state('networkidle')
+
+        # Generate PDF
+        await page.pdf(**pdf_options)
+    finally:
+        await page.close()
+
+
 async def html_to_pdf_playwright(html_content: str, output_path: str,
                                  page_size: str = 'A4',
-                                 orientation: str = 'portrait') -> bool:
+                                 orientation: str = 'portrait',
+                                 browser=None) -> bool:
     """
     Convert HTML to PDF using Playwright (Chromium).
 
@@ -289,6 +324,8 @@ async def html_to_pdf_playwright(html_content: str, output_path: str,
         output_path: Path to output PDF file
         page_size: Page size ('A4', 'A3', 'Letter')
         orientation: 'portrait' or 'landscape'
+        browser: Running async Playwright browser to print with
+                 (default: launch a new Chromium for this document)
 
     Returns:
         True if successful, False otherwise
@@ -324,20 +361,13 @@ async def html_to_pdf_playwright(html_content: str, output_path: str,
         }
 
         # Render with Playwright
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
-
-            # Load HTML file
-            await page.goto(f'file://{os.path.abspath(html_path)}')
-
-            # Wait for any dynamic content
-            await page.wait_for_load_state('networkidle')
-
-            # Generate PDF
-            await page.pdf(**pdf_options)
-
-            await browser.close()
+        if browser is None:
+            async with async_playwright() as p:
+                browser = await p.chromium.launch()
+                await _print_pdf(browser, html_path, pdf_options)
+                await browser.close()
+        else:
+            await _print_pdf(browser, html_path, pdf_options)
 
         # Cleanup temporary file
         try:
@@ -354,11 +384,70 @@ async def html_to_pdf_playwright(html_content: str, output_path: str,
         return False
 
 
+def get_pdf_cache_path(html_content: str, page_size: str = 'A4',
+                       orientation: str = 'portrait') -> str:
+    """
+    Get the on-disk cache location for the PDF printed from an HTML document
+
+    The file name is a hash of the complete HTML (which already embeds the
+    rendered diagrams), the print options and the md2pdf version. Files the
+    HTML only references, such as local images or stylesheets, are not part
+    of the key, which is why the PDF cache is off unless requested.
+
+    Args:
+        html_content: Complete HTML document
+        page_size: Page size ('A4', 'A3', 'Letter')
+        orientation: 'portrait' or 'landscape'
+
+    Returns:
+        Path to the cached PDF file (may not exist yet)
+    """
+    from . import __version__
+    from .mermaid import _user_cache_dir
+
+    key = f'{__version__}:{page_size}:{orientation.lower()}\n{html_content}'
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(_user_cache_dir('pdf'), f'{digest}.pdf')
+
+
+def _copy_cached_pdf(cache_path: Optional[str], output_path: str) -> bool:
+    """Copy a cached PDF to output_path; False if there is no usable cached copy."""
+    from .mermaid import _touch
+
+    if not cache_path or not os.path.exists(cache_path):
+        return False
+    try:
+        shutil.copyfile(cache_path, output_path)
+    except OSError as e:
+        print(f"Warning: Could not use cached PDF: {e}")
+        return False
+    _touch(cache_path)  # Mark as recently used (best effort)
+    return True
+
+
+def _store_cached_pdf(output_path: str, cache_path: str) -> None:
+    """Copy a freshly generated PDF into the cache, trimming old entries."""
+    from .mermaid import _make_cache_dir, _prune_cache
+
+    try:
+        _make_cache_dir(os.path.dirname(cache_path))
+        # Copy next to the final location first so readers never see a partial file
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp.pdf'
+        shutil.copyfile(output_path, tmp_path)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: Could not cache PDF: {e}")
+        return
+    _prune_cache(os.path.dirname(cache_path), MAX_PDF_CACHE_ENTRIES, suffix='.pdf')
+
+
 def convert_markdown_to_pdf_html(markdown_text: str, output_path: str,
                                  title: str = "Document",
                                  page_size: str = 'A4',
                                  orientation: str = 'portrait',
-                                 enable_mermaid: bool = True) -> dict:
+                                 enable_mermaid: bool = True,
+                                 mermaid_cache: bool = True,
+                                 pdf_cache: bool = False) -> dict:
     """
     Convert Markdown to PDF via HTML rendering (supports emoji!).
 
@@ -371,13 +460,29 @@ def convert_markdown_to_pdf_html(markdown_text: str, output_path: str,
         title: Document title
         page_size: Page size ('A4', 'A3', 'Letter')
         orientation: 'portrait' or 'landscape'
+        enable_mermaid: Enable Mermaid diagram rendering
+        mermaid_cache: Reuse previously rendered diagrams from the on-disk cache
+        pdf_cache: Reuse the PDF generated earlier from identical HTML and
+                   options instead of printing it again with Chromium
+                   (off by default: changes to local images or stylesheets
+                   the document links to are not detected)
 
     Returns:
         dict with success status
     """
     try:
         # Convert Markdown to HTML
-        html_content = markdown_to_html(markdown_text, title, enable_mermaid)
+        html_content = markdown_to_html(markdown_text, title, enable_mermaid, mermaid_cache)
+
+        # Unchanged document: copy the PDF printed last time
+        cache_path = get_pdf_cache_path(html_content, page_size, orientation) if pdf_cache else None
+        if _copy_cached_pdf(cache_path, output_path):
+            return {
+                'success': True,
+                'method': 'html_playwright',
+                'emoji_support': True,
+                'cached': True
+            }
 
         # Use asyncio to run the async function
         import asyncio
@@ -385,6 +490,9 @@ def convert_markdown_to_pdf_html(markdown_text: str, output_path: str,
             html_content, output_path, page_size, orientation
         ))
 
+        if success and cache_path:
+            _store_cached_pdf(output_path, cache_path)
+
         return {
             'success': success,
             'method': 'html_playwright',
@@ -397,3 +505,88 @@ def convert_markdown_to_pdf_html(markdown_text: str, output_path: str,
             'error': str(e),
             'method': 'html_playwright'
         }
+
+
+class PdfRenderer:
+    """
+    Convert several documents with one Chromium instance (async context manager).
+
+    convert_markdown_to_pdf_html() launches Chromium for every document.
+    When converting many documents, keep one browser running instead:
+
+        async with PdfRenderer() as renderer:
+            for text, path in documents:
+                await renderer.convert(text, path)
+    """
+
+    def __init__(self):
+        self._playwright = None
+        self.browser = None
+
+    async def __aenter__(self):
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        try:
+            self.browser = await self._playwright.chromium.launch()
+        except Exception:
+            await self._playwright.stop()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        try:
+            await self.browser.close()
+        finally:
+            await self._playwright.stop()
+
+    async def convert(self, markdown_text: str, output_path: str,
+                      title: str = "Document",
+                      page_size: str = 'A4',
+                      orientation: str = 'portrait',
+                      enable_mermaid: bool = True,
+                      mermaid_cache: bool = True,
+                      pdf_cache: bool = False) -> dict:
+        """
+        Convert Markdown to PDF with the shared browser.
+
+        Takes the same options and returns the same dict as
+        convert_markdown_to_pdf_html().
+        """
+        import asyncio
+
+        try:
+            # Diagrams are rendered with Playwright's sync API, which cannot
+            # run inside an event loop: build the HTML in a worker thread
+            html_content = await asyncio.to_thread(
+                markdown_to_html, markdown_text, title, enable_mermaid, mermaid_cache
+            )
+
+            cache_path = get_pdf_cache_path(html_content, page_size, orientation) if pdf_cache else None
+            if _copy_cached_pdf(cache_path, output_path):
+                return {
+                    'success': True,
+                    'method': 'html_playwright',
+                    'emoji_support': True,
+                    'cached': True
+                }
+
+            success = await html_to_pdf_playwright(
+                html_content, output_path, page_size, orientation, browser=self.browser
+            )
+
+            if success and cache_path:
+                _store_cached_pdf(output_path, cache_path)
+
+            return {
+                'success': success,
+                'method': 'html_playwright',
+                'emoji_support': True
+            }
+
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'method': 'html_playwright'
+            }
@@ -5,56 +5,106 @@ Converts Mermaid diagrams to PNG images using Playwright
 """
 
 import os
+import sys
+import json
+import hashlib
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
-# Check if Playwright is available
-PLAYWRIGHT_AVAILABLE = False
-try:
-    from playwright.sync_api import sync_playwright
-    PLAYWRIGHT_AVAILABLE = True
-except ImportError:
-    pass
 
+# Parallel rendering is opt-in: MD2PDF_MERMAID_WORKERS sets the maximum
+# number of browser processes, each used only once it has at least
+# MIN_DIAGRAMS_PER_WORKER diagrams to render
+MERMAID_WORKERS_ENV = 'MD2PDF_MERMAID_WORKERS'
+MIN_DIAGRAMS_PER_WORKER = 2
 
-def is_playwright_available():
-    """Check if Playwright is installed and browsers are available"""
-    return PLAYWRIGHT_AVAILABLE
+# Maximum height of a rendered diagram in pixels (fits in one PDF page)
+MAX_DIAGRAM_HEIGHT = 2400
 
+# Rendered diagrams kept in the on-disk cache; least recently used go first
+MAX_CACHE_ENTRIES = 256
 
-def render_mermaid_to_png(mermaid_code, output_path, width=1400, height=1000, scale=2, theme='default'):
+# Mermaid.js is imported from the CDN unless MD2PDF_MERMAID_JS names a local
+# copy of the standalone build (mermaid.min.js), which is inlined instead
+MERMAID_CDN_URL = 'https://cdn.jsdelivr.net/npm/mermaid@11/dist/mermaid.esm.min.mjs'
+MERMAID_JS_ENV = 'MD2PDF_MERMAID_JS'
+
+# Times loading Mermaid into the render page is tried before giving up
+MERMAID_LOAD_ATTEMPTS = 3
+
+
+@functools.lru_cache(maxsize=1)
+def is_playwright_available():
     """
-    Render a Mermaid diagram to PNG
+    Check if Playwright is installed
 
-    Args:
-        mermaid_code: Mermaid code (string)
-        output_path: Path to output PNG file
-        width: Image width in pixels (default 1400px)
-        height: Image height in pixels (default 1000px)
-        scale: Device scale factor for high-resolution rendering (default 2 = 2x resolution)
-               Higher values = sharper images but larger file size
-               Recommended: 2 for standard, 3 for very high quality
+    The import is attempted once, on first use, so importing md2pdf stays
+    cheap for documents without Mermaid diagrams. The result is memoized for
+    the life of the process; call is_playwright_available.cache_clear() after
+    installing Playwright in a running process to probe again.
+    """
+    try:
+        import playwright.sync_api
+    except ImportError:
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=1)
+def _local_mermaid_js():
+    """
+    Read the local Mermaid.js named by MD2PDF_MERMAID_JS, once per process
 
     Returns:
-        True if successful, False otherwise
+        Script source ready to inline in a <script> element, or None to use the CDN
     """
+    path = os.environ.get(MERMAID_JS_ENV)
+    if not path:
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+    except OSError as e:
+        print(f"Warning: Cannot read {MERMAID_JS_ENV}={path} ({e}), using the CDN")
+        return None
+    # A literal </script> would end the inline element early
+    return source.replace('</script', '<\\/script')
 
-    if not PLAYWRIGHT_AVAILABLE:
-        return False
 
-    # HTML template with Mermaid.js from CDN
-    html_template = f"""
+def _build_html(theme='default'):
+    """
+    Build the HTML page that renders Mermaid diagrams
+
+    The page loads and initializes Mermaid once and then sets
+    window.__mermaidReady; each diagram is rendered into #diagram by
+    _render_on_page() without reloading the page.
+    """
+    # HTML template with Mermaid.js inlined from a local copy, or from CDN
+    local_js = _local_mermaid_js()
+    if local_js is None:
+        mermaid_script = ''
+        mermaid_import = f"import mermaid from '{MERMAID_CDN_URL}';"
+    else:
+        mermaid_script = f'<script>{local_js}</script>'
+        mermaid_import = 'const mermaid = window.mermaid;'
+    return f"""
     <!DOCTYPE html>
     <html>
     <head>
+        {mermaid_script}
         <script type="module">
-            import mermaid from 'https://cdn.jsdelivr.net/npm/mermaid@11/dist/mermaid.esm.min.mjs';
+            {mermaid_import}
             mermaid.initialize({{
-                startOnLoad: true,
-                theme: '{theme}',
+                startOnLoad: false,
+                theme: {json.dumps(theme)},
                 flowchart: {{
                     useMaxWidth: false,
                     htmlLabels: true
                 }}
             }});
+            window.mermaid = mermaid;
+            window.__mermaidReady = true;
         </script>
         <style>
             body {{
@@ -68,114 +118,467 @@ def render_mermaid_to_png(mermaid_code, output_path, width=1400, height=1000, sc
         </style>
     </head>
     <body>
-        <div id="diagram" class="mermaid">
-{mermaid_code}
-        </div>
+        <div id="diagram"></div>
     </body>
     </html>
     """
 
+
+# Draws one diagram into #diagram of the page built by _build_html
+_RENDER_DIAGRAM_JS = '''async (code) => {
+    window.__diagramCount = (window.__diagramCount || 0) + 1;
+    const { svg } = await window.mermaid.render(`diagram-svg-${window.__diagramCount}`, code);
+    document.querySelector('#diagram').innerHTML = svg;
+    await document.fonts.ready;
+}'''
+
+# Crops the rendered SVG to its content and sizes it for output; returns the
+# serialized SVG when asSvg is set, else the pixel size it was laid out at
+_PREPARE_SVG_JS = '''({targetWidth, maxHeight, asSvg}) => {
+    const svg = document.querySelector('#diagram svg');
+
+    // Get actual content bounding box
+    const bbox = svg.getBBox();
+    const aspectRatio = bbox.height / bbox.width;
+
+    // Target dimensions (width * scale for quality), limiting the height
+    // to prevent very tall diagrams
+    let targetHeight = targetWidth * aspectRatio;
+    if (targetHeight > maxHeight) {
+        targetHeight = maxHeight;
+        targetWidth = targetHeight / aspectRatio;
+    }
+
+    // Set viewBox to content bounds (removes whitespace)
+    svg.setAttribute('viewBox', `${bbox.x} ${bbox.y} ${bbox.width} ${bbox.height}`);
+
+    if (asSvg) {
+        return new XMLSerializer().serializeToString(svg);
+    }
+
+    // Lay the SVG out at the target pixel size, so it can be
+    // screenshotted as is (whole pixels, like a canvas of that size)
+    svg.style.maxWidth = 'none';
+    const size = {width: Math.floor(targetWidth), height: Math.floor(targetHeight)};
+    svg.setAttribute('width', size.width);
+    svg.setAttribute('height', size.height);
+    svg.style.display = 'block';
+    return size;
+}'''
+
+
+def _load_mermaid_page(page, theme):
+    """
+    Load the Mermaid page (see _build_html) and wait until it can render
+
+    Loading Mermaid from the CDN can time out on a network blip, so a timed
+    out load is retried (MERMAID_LOAD_ATTEMPTS in total). Errors rendering a
+    diagram are not retried: they come from the diagram itself.
+    """
+    from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+    for attempt in range(1, MERMAID_LOAD_ATTEMPTS + 1):
+        try:
+            page.set_content(_build_html(theme))
+            page.wait_for_function('window.__mermaidReady === true', timeout=15000)
+            return
+        except PlaywrightTimeoutError:
+            if attempt == MERMAID_LOAD_ATTEMPTS:
+                raise
+            print(f"Warning: Loading Mermaid timed out, retrying ({attempt}/{MERMAID_LOAD_ATTEMPTS - 1})")
+
+
+def _render_on_page(page, mermaid_code, output_path, width, height, scale):
+    """
+    Render one diagram on a page prepared by _load_mermaid_page()
+
+    Saves the image to output_path unless it is None, and returns the
+    image data (PNG bytes, or SVG bytes for .svg outputs).
+    """
+    # Render with the already loaded Mermaid, replacing the previous diagram
+    # (raises if the diagram cannot be parsed)
+    page.evaluate(_RENDER_DIAGRAM_JS, mermaid_code)
+
+    # CRITICAL: Prepare SVG with proper viewBox (removes whitespace)
+    # Then size it to the exact target dimensions
+    as_svg = bool(output_path and output_path.endswith('.svg'))
+    svg_result = page.evaluate(_PREPARE_SVG_JS, {
+        'targetWidth': width * scale,
+        'maxHeight': MAX_DIAGRAM_HEIGHT,
+        'asSvg': as_svg
+    })
+
+    # Check if output should be SVG (based on file extension)
+    if as_svg:
+        # Save as SVG (vector format)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(svg_result)
+        return svg_result.encode('utf-8')
+    else:
+        # Viewport just large enough for the diagram, keeping the page's
+        # backing store no bigger than the image itself
+        page.set_viewport_size({
+            'width': max(svg_result['width'], 1),
+            'height': max(svg_result['height'], 1)
+        })
+
+        # Screenshot the SVG element (written to output_path if given)
+        return page.locator('#diagram svg').screenshot(path=output_path)
+
+
+def _render_in_browser(specs, scale, theme):
+    """
+    Render several Mermaid diagrams using a single Chromium instance
+
+    Launching the browser dominates the cost of rendering a diagram, so the
+    whole batch is rendered in one browser session.
+
+    Args:
+        specs: List of (mermaid_code, output_path, width, height) tuples
+               output_path may be None to only return the image data
+        scale: Device scale factor for high-resolution rendering
+        theme: Mermaid theme name
+
+    Returns:
+        List with the image data (bytes) for each spec, or None where rendering failed
+    """
+    results = [None] * len(specs)
+
+    if not specs or not is_playwright_available():
+        return results
+
+    from playwright.sync_api import sync_playwright
+
     try:
         with sync_playwright() as p:
             # Use Chromium headless
             browser = p.chromium.launch(headless=True)
-            # Use deviceScaleFactor=1 and scale dimensions in JavaScript instead
-            # This avoids viewport scaling issues
-            page = browser.new_page(viewport={
-                'width': width * 2,  # Large viewport to accommodate scaled SVG
-                'height': height * 2,
-                'deviceScaleFactor': 1
-            })
-
-            # Load HTML with Mermaid
-            page.set_content(html_template)
-
-            # Wait for Mermaid to render
-            page.wait_for_selector('#diagram svg', timeout=15000)
-
-            # Wait a bit more for stabilization
-            page.wait_for_timeout(1000)
-
-            # CRITICAL: Prepare SVG with proper viewBox (removes whitespace)
-            # Then render to canvas at exact target dimensions
-            svg_data = page.evaluate(f'''() => {{
-                const svg = document.querySelector('#diagram svg');
-
-                // Get actual content bounding box
-                const bbox = svg.getBBox();
-                const naturalWidth = bbox.width;
-                const naturalHeight = bbox.height;
-                const aspectRatio = naturalHeight / naturalWidth;
-
-                // Calculate target dimensions (width * scale for quality)
-                let targetWidth = {width} * {scale};
-                let targetHeight = targetWidth * aspectRatio;
-
-                // Limit maximum height to prevent very tall diagrams
-                const maxHeight = 2400;  // Max height in pixels (fits in one PDF page)
-                if (targetHeight > maxHeight) {{
-                    targetHeight = maxHeight;
-                    targetWidth = targetHeight / aspectRatio;
-                }}
+            try:
+                # Use deviceScaleFactor=1 and scale dimensions in JavaScript instead
+                # This avoids viewport scaling issues
+                # Small initial viewport: the diagram SVG is laid out at its
+                # explicit size, and the viewport is fitted to it per diagram
+                context = browser.new_context(viewport={'width': 800, 'height': 600},
+                                              device_scale_factor=1)
+                page = context.new_page()
+
+                # Mermaid is loaded once and every diagram is drawn on the same page
+                _load_mermaid_page(page, theme)
 
-                // Set viewBox to content bounds (removes whitespace)
-                svg.setAttribute('viewBox', `${{bbox.x}} ${{bbox.y}} ${{bbox.width}} ${{bbox.height}}`);
-
-                // Return dimensions for canvas rendering
-                return {{
-                    targetWidth: targetWidth,
-                    targetHeight: targetHeight,
-                    svgString: new XMLSerializer().serializeToString(svg)
-                }};
-            }}''')
-
-            # Check if output should be SVG (based on file extension)
-            if output_path.endswith('.svg'):
-                # Save as SVG (vector format)
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write(svg_data['svgString'])
-            else:
-                # Render SVG to canvas at exact target dimensions, then screenshot
-                page.evaluate(f'''() => {{
-                    const svgData = {svg_data};
-
-                    // Create canvas with exact target dimensions
-                    const canvas = document.createElement('canvas');
-                    canvas.width = svgData.targetWidth;
-                    canvas.height = svgData.targetHeight;
-                    canvas.id = 'render-canvas';
-
-                    // Clear diagram div and add canvas
-                    const diagramDiv = document.querySelector('#diagram');
-                    diagramDiv.innerHTML = '';
-                    diagramDiv.appendChild(canvas);
-
-                    // Draw SVG to canvas
-                    const ctx = canvas.getContext('2d');
-                    const img = new Image();
-                    const svgBlob = new Blob([svgData.svgString], {{type: 'image/svg+xml;charset=utf-8'}});
-                    const url = URL.createObjectURL(svgBlob);
-
-                    return new Promise((resolve) => {{
-                        img.onload = () => {{
-                            ctx.drawImage(img, 0, 0, svgData.targetWidth, svgData.targetHeight);
-                            URL.revokeObjectURL(url);
-                            resolve();
-                        }};
-                        img.src = url;
-                    }});
-                }}''')
-
-                # Wait for canvas rendering
-                page.wait_for_timeout(500)
-
-                # Screenshot the canvas element
-                canvas_element = page.query_selector('#render-canvas')
-                canvas_element.screenshot(path=output_path)
-
-            browser.close()
-            return True
+                for i, (mermaid_code, output_path, width, height) in enumerate(specs):
+                    try:
+                        results[i] = _render_on_page(page, mermaid_code, output_path,
+                                                     width, height, scale)
+                    except Exception as e:
+                        print(f"Error rendering Mermaid: {e}")
+            finally:
+                browser.close()
 
     except Exception as e:
         print(f"Error rendering Mermaid: {e}")
+
+    return results
+
+
+def _max_render_workers():
+    """
+    Maximum number of browser processes for one batch, from MD2PDF_MERMAID_WORKERS
+
+    Defaults to 1 (no worker processes), so library callers never get a
+    process pool they did not ask for, and is always 1 inside a worker
+    process (e.g. the CLI's per-file workers) so pools are never nested.
+    """
+    import multiprocessing
+
+    if multiprocessing.parent_process() is not None:
+        return 1
+    value = os.environ.get(MERMAID_WORKERS_ENV)
+    if not value:
+        return 1
+    try:
+        return max(int(value), 1)
+    except ValueError:
+        print(f"Warning: Ignoring {MERMAID_WORKERS_ENV}={value} (not a number)")
+        return 1
+
+
+def _render_batch(specs, scale, theme):
+    """
+    Render several Mermaid diagrams, in parallel browsers if enabled
+
+    Diagrams are independent, so with MD2PDF_MERMAID_WORKERS set large
+    batches are split across worker processes, each rendering its share in
+    its own Chromium instance. Small batches stay in one browser, where
+    startup cost would dominate.
+
+    Args:
+        specs: List of (mermaid_code, output_path, width, height) tuples
+        scale: Device scale factor for high-resolution rendering
+        theme: Mermaid theme name
+
+    Returns:
+        List with the image data (bytes) for each spec, or None where rendering failed
+    """
+    workers = min(_max_render_workers(), os.cpu_count() or 1,
+                  len(specs) // MIN_DIAGRAMS_PER_WORKER)
+    if workers <= 1 or not is_playwright_available():
+        return _render_in_browser(specs, scale, theme)
+
+    # Interleave so each worker gets a similar mix of the document's diagrams
+    chunks = [specs[w::workers] for w in range(workers)]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunk_results = list(executor.map(_render_in_browser, chunks,
+                                              repeat(scale), repeat(theme)))
+    except Exception as e:
+        # e.g. processes cannot be started from this context
+        print(f"Warning: Parallel Mermaid rendering failed ({e}), rendering sequentially")
+        return _render_in_browser(specs, scale, theme)
+
+    results = [None] * len(specs)
+    for w, chunk_result in enumerate(chunk_results):
+        results[w::workers] = chunk_result
+    return results
+
+
+def render_mermaid_batch(specs, scale=2, theme='default'):
+    """
+    Render several Mermaid diagrams to files using a single Chromium instance
+
+    Args:
+        specs: List of (mermaid_code, output_path, width, height) tuples
+        scale: Device scale factor for high-resolution rendering (default 2)
+        theme: Mermaid theme name (default 'default')
+
+    Returns:
+        List of booleans, one per spec: True if that diagram was rendered
+    """
+    return [data is not None for data in _render_batch(specs, scale, theme)]
+
+
+def render_mermaid_to_bytes_batch(mermaid_codes, width=1400, height=1000, scale=2, theme='default'):
+    """
+    Render several Mermaid diagrams to in-memory PNG data, without temporary files
+
+    Args:
+        mermaid_codes: List of Mermaid code strings
+        width, height, scale, theme: Rendering options (see render_mermaid_to_png)
+
+    Returns:
+        List with the PNG bytes for each diagram, or None where rendering failed
+    """
+    # Identical diagrams are rendered once and share the PNG data
+    unique_codes = list(dict.fromkeys(mermaid_codes))
+    specs = [(code, None, width, height) for code in unique_codes]
+    rendered = dict(zip(unique_codes, _render_batch(specs, scale, theme)))
+    return [rendered[code] for code in mermaid_codes]
+
+
+def render_mermaid_to_png(mermaid_code, output_path, width=1400, height=1000, scale=2, theme='default'):
+    """
+    Render a Mermaid diagram to PNG
+
+    Args:
+        mermaid_code: Mermaid code (string)
+        output_path: Path to output PNG file
+        width: Image width in pixels (default 1400px)
+        height: Image height in pixels (default 1000px)
+        scale: Device scale factor for high-resolution rendering (default 2 = 2x resolution)
+               Higher values = sharper images but larger file size
+               Recommended: 2 for standard, 3 for very high quality
+
+    Returns:
+        True if successful, False otherwise
+    """
+    return render_mermaid_batch([(mermaid_code, output_path, width, height)],
+                                scale=scale, theme=theme)[0]
+
+
+def get_cache_path(mermaid_code, width=1400, height=1000, scale=2, theme='default'):
+    """
+    Get the on-disk cache location for a rendered Mermaid diagram
+
+    The file name is a hash of the diagram source, every option that
+    affects the rendered image, the md2pdf version and the Mermaid.js in use
+    (see _mermaid_js_id), so identical diagrams are reused across runs.
+
+    Args:
+        mermaid_code: Mermaid code (string)
+        width, height, scale, theme: Rendering options (see render_mermaid_to_png)
+
+    Returns:
+        Path to the cached PNG file (may not exist yet)
+    """
+    from . import __version__
+
+    key = f'{__version__}:{_mermaid_js_id()}\n{width}x{height}@{scale}:{theme}\n{mermaid_code}'
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(_cache_dir(), f'{digest}.png')
+
+
+@functools.lru_cache(maxsize=1)
+def _mermaid_js_id():
+    """Identify the Mermaid.js used for rendering: the CDN URL, or a hash of the local copy"""
+    local_js = _local_mermaid_js()
+    if local_js is None:
+        return MERMAID_CDN_URL
+    return 'local:' + hashlib.blake2b(local_js.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _user_cache_dir(name):
+    """
+    Per-user directory for one of md2pdf's on-disk caches
+
+    Caches live under the user's cache directory ($XDG_CACHE_HOME or
+    ~/.cache, ~/Library/Caches on macOS, %LOCALAPPDATA% on Windows) rather
+    than the shared temp directory, so other users can neither fill nor
+    read them. Use _make_cache_dir() to create it.
+    """
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~\\AppData\\Local')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'md2pdf', name)
+
+
+def _make_cache_dir(path):
+    """Create a cache directory (and md2pdf's parent one) readable by the current user only"""
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+
+
+def _cache_dir():
+    """Directory of the on-disk Mermaid cache"""
+    return _user_cache_dir('mermaid')
+
+
+def clear_cache():
+    """Delete every diagram from the on-disk Mermaid cache"""
+    _prune_cache(_cache_dir(), 0)
+
+
+def _touch(path):
+    """Mark a cached diagram as recently used; False if it is not cached"""
+    try:
+        os.utime(path)
+    except OSError:
         return False
+    return True
+
+
+def _prune_cache(cache_dir, keep, suffix='.png'):
+    """Delete the least recently used cached files beyond the newest `keep`"""
+    try:
+        entries = [entry for entry in os.scandir(cache_dir)
+                   if entry.name.endswith(suffix) and not entry.name.endswith('.tmp' + suffix)]
+    except OSError:
+        return
+    if len(entries) <= keep:
+        return
+
+    def last_used(entry):
+        try:
+            return entry.stat().st_mtime
+        except OSError:
+            return 0
+
+    entries.sort(key=last_used, reverse=True)
+    for entry in entries[keep:]:
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def render_mermaid_cached_batch(mermaid_codes, width=1400, height=1000, scale=2, theme='default'):
+    """
+    Render several Mermaid diagrams to PNG, reusing previously cached images
+
+    Only diagrams missing from the cache are rendered, all in one browser session.
+    Cached images are touched on reuse, and once new ones are added the cache
+    is trimmed to MAX_CACHE_ENTRIES, dropping the least recently used.
+    If the cache directory cannot be created or written, diagrams are
+    rendered in memory instead and returned as PNG bytes.
+
+    Args:
+        mermaid_codes: List of Mermaid code strings
+        width, height, scale, theme: Rendering options (see render_mermaid_to_png)
+
+    Returns:
+        List with the cached PNG path (or PNG bytes, see above) for each diagram,
+        or None where rendering failed
+        The files are owned by the cache and must not be deleted by the caller
+    """
+    paths = [get_cache_path(code, width, height, scale, theme) for code in mermaid_codes]
+    results = [path if _touch(path) else None for path in paths]
+
+    # Identical diagrams share a cache entry, so each one is rendered once
+    missing = {}
+    for i, path in enumerate(results):
+        if path is None:
+            missing.setdefault(paths[i], i)
+    if not missing:
+        return results
+
+    cache_dir = os.path.dirname(next(iter(missing)))
+    try:
+        _make_cache_dir(cache_dir)
+        if not os.access(cache_dir, os.W_OK):
+            raise PermissionError(f"{cache_dir} is not writable")
+    except OSError as e:
+        print(f"Warning: Cannot use the Mermaid cache ({e}), rendering without it")
+        codes = [mermaid_codes[i] for i in missing.values()]
+        rendered = dict(zip(missing, render_mermaid_to_bytes_batch(codes, width, height,
+                                                                   scale, theme)))
+        return [rendered[path] if result is None else result
+                for path, result in zip(paths, results)]
+
+    # Render next to the final location and move into place on success,
+    # so a failed render never leaves a broken cache entry behind
+    specs = [(mermaid_codes[i], f'{path}.{os.getpid()}.tmp.png', width, height)
+             for path, i in missing.items()]
+    rendered = render_mermaid_batch(specs, scale=scale, theme=theme)
+
+    cached = {}
+    for path, (_, tmp_path, _, _), success in zip(missing, specs, rendered):
+        if success:
+            try:
+                os.replace(tmp_path, path)
+                cached[path] = path
+                continue
+            except OSError as e:
+                # Keep the rendered image even if it cannot be stored
+                print(f"Warning: Could not cache Mermaid diagram: {e}")
+                try:
+                    with open(tmp_path, 'rb') as f:
+                        cached[path] = f.read()
+                except OSError:
+                    pass
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+    if cached:
+        # Never evict diagrams this batch is about to return
+        _prune_cache(cache_dir, max(MAX_CACHE_ENTRIES, len(set(paths))))
+
+    return [cached.get(path, result) for path, result in zip(paths, results)]
+
+
+def render_mermaid_cached(mermaid_code, width=1400, height=1000, scale=2, theme='default'):
+    """
+    Render a Mermaid diagram to PNG, reusing a previously cached image
+
+    Args:
+        mermaid_code: Mermaid code (string)
+        width, height, scale, theme: Rendering options (see render_mermaid_to_png)
+
+    Returns:
+        Path to the cached PNG file (PNG bytes if it cannot be cached),
+        or None if rendering failed
+        The file is owned by the cache and must not be deleted by the caller
+    """
+    return render_mermaid_cached_batch([mermaid_code], width, height, scale, theme)[0]
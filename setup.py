@@ -2,13 +2,45 @@
 md2pdf-mermaid - Markdown to PDF Converter with Mermaid Support
 """
 
+import os
 from setuptools import setup, find_packages
+from setuptools.command.build_ext import build_ext
 from pathlib import Path
 
 # Read long description from README
 readme_file = Path(__file__).parent / "README.md"
 long_description = readme_file.read_text(encoding="utf-8") if readme_file.exists() else ""
 
+# Optional Cython build of the markdown parser (md2pdf/_parse.py + _parse.pxd),
+# opt-in with MD2PDF_BUILD_CYTHON=1 and Cython installed (e.g. pip install
+# --no-build-isolation). By default the build stays pure Python, producing the
+# py3-none-any wheel that is published to PyPI
+ext_modules = []
+if os.environ.get("MD2PDF_BUILD_CYTHON") == "1":
+    try:
+        from Cython.Build import cythonize
+        ext_modules = cythonize(["md2pdf/_parse.py"], language_level=3, quiet=True)
+    except ImportError:
+        print("Warning: MD2PDF_BUILD_CYTHON=1 but Cython is not installed, using pure Python")
+    except Exception as e:
+        print(f"Warning: Cython could not translate md2pdf/_parse.py, using pure Python ({e})")
+
+
+class OptionalBuildExt(build_ext):
+    """build_ext that never fails the install when compilation is not possible"""
+
+    def run(self):
+        try:
+            super().run()
+        except Exception as e:
+            print(f"Warning: Skipping optional C extensions ({e})")
+
+    def build_extension(self, ext):
+        try:
+            super().build_extension(ext)
+        except Exception as e:
+            print(f"Warning: Failed to build {ext.name}, using pure Python ({e})")
+
 setup(
     name="md2pdf-mermaid",
     version="1.3.1",
@@ -20,9 +52,11 @@ setup(
     url="https://github.com/rbutinar/md2pdf-mermaid",
     packages=find_packages(),
     package_data={
-        'md2pdf': ['fonts/*.ttf'],
+        'md2pdf': ['fonts/*.ttf', '*.pxd'],
     },
     include_package_data=True,
+    ext_modules=ext_modules,
+    cmdclass={"build_ext": OptionalBuildExt},
     license="MIT",
     classifiers=[
         "Development Status :: 4 - Beta",
@@ -30,13 +64,13 @@ setup(
         "Topic :: Documentation",
         "Topic :: Text Processing :: Markup",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.8",
-        "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",
+        "Programming Language :: Python :: 3.12",
+        "Programming Language :: Python :: 3.13",
         "Operating System :: OS Independent",
     ],
-    python_requires=">=3.8",
+    python_requires=">=3.10",
     install_requires=[
         "reportlab>=4.0.0",
         "playwright>=1.40.0",